@@ -0,0 +1,90 @@
+"""Benchmark of status checkers on generated vaults
+
+    pip install -e . && python benchmarks/bench_checkers.py
+"""
+from copy import deepcopy
+from datetime import datetime, timedelta
+import random
+import time
+
+from passpie import checkers
+
+
+def repeated_quadratic(credentials, limit):
+    result_credentials = deepcopy(credentials)
+    for i, cred in enumerate(credentials):
+        rep = [c['fullname'] for c in credentials if c['password'] == cred['password']]
+        rep = [fullname for fullname in rep if fullname != cred['fullname']][:limit]
+        result_credentials[i]['repeated'] = rep if rep else None
+    return result_credentials
+
+
+def similar_all_pairs(credentials, limit, distance=2, min_length=6):
+    result_credentials = []
+    for cred in credentials:
+        sim = [c['fullname'] for c in credentials
+               if min(len(cred['password']), len(c['password'])) >= min_length
+               if 0 < checkers.levenshtein(cred['password'], c['password'], distance) <= distance]
+        result_credentials.append(dict(cred, similar=sim[:limit] if sim else None))
+    return result_credentials
+
+
+def make_credentials(size, seed=0):
+    rand = random.Random(seed)
+    now = datetime.now()
+    return [{
+        'fullname': u'login{}@example{}.com'.format(i, i % 97),
+        'password': u'password{}'.format(rand.randrange(size // 2 or 1)),
+        'comment': u'',
+        'modified': now - timedelta(days=rand.randrange(365)),
+    } for i in range(size)]
+
+
+def make_variants(size, seed=0):
+    rand = random.Random(seed)
+    passwords = []
+    for i in range(size):
+        if passwords and rand.random() < 0.2:
+            base = rand.choice(passwords)
+            position = rand.randrange(len(base))
+            passwords.append(base[:position] + rand.choice('0123456789!') + base[position + 1:])
+        else:
+            passwords.append(u''.join(rand.choice('abcdefghijklmnopqrstuvwxyz0123456789')
+                                      for _ in range(rand.randrange(8, 16))))
+    return [{'fullname': u'login{}@example.com'.format(i), 'password': p}
+            for i, p in enumerate(passwords)]
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+
+def main(sizes=(1000, 10000, 100000), baseline_max_size=10000):
+    for size in sizes:
+        credentials = make_credentials(size)
+        elapsed, result = timed(lambda: checkers.modified(checkers.repeated(credentials, 5), 90))
+        line = '{:>7} credentials: {:8.3f}s'.format(size, elapsed)
+        if size <= baseline_max_size:
+            baseline, expected = timed(repeated_quadratic, credentials, 5)
+            assert [c['repeated'] for c in result] == [c['repeated'] for c in expected]
+            line += '  repeated before: {:8.3f}s'.format(baseline)
+        print(line)
+
+
+def main_similar(sizes=(1000, 10000, 30000), baseline_max_size=1000):
+    for size in sizes:
+        credentials = make_variants(size)
+        elapsed, result = timed(checkers.similar, credentials, 5)
+        line = '{:>7} credentials: {:8.3f}s similar'.format(size, elapsed)
+        if size <= baseline_max_size:
+            baseline, expected = timed(similar_all_pairs, credentials, 5)
+            assert [bool(c['similar']) for c in result] == [bool(c['similar']) for c in expected]
+            line += '  all pairs: {:8.3f}s'.format(baseline)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
+    main_similar()
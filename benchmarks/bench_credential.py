@@ -0,0 +1,44 @@
+"""Microbenchmark of fullname parsing
+
+    pip install -e . && python benchmarks/bench_credential.py
+"""
+import re
+import timeit
+
+from passpie.credential import split_fullname, split_fullnames
+
+
+def split_fullname_uncached(fullname):
+    regex = re.compile(r'(?:(?P<login>.+?(?:\@.+?)?)@(?P<name>.+?$))')
+    regex_name_only = re.compile(r'(?P<at>@)?(?P<name>.+?$)')
+
+    if regex.match(fullname):
+        mobj = regex.match(fullname)
+    elif regex_name_only.match(fullname):
+        mobj = regex_name_only.match(fullname)
+    else:
+        raise ValueError("Not a valid name")
+
+    if mobj.groupdict().get('at'):
+        login = ""
+    else:
+        login = mobj.groupdict().get('login')
+    return login, mobj.groupdict().get("name")
+
+
+FULLNAMES = ['login{}@example{}.com'.format(i, i % 100) for i in range(1000)]
+
+
+def main(number=20):
+    benchmarks = [
+        ('split_fullname (uncached)', lambda: [split_fullname_uncached(f) for f in FULLNAMES]),
+        ('split_fullname', lambda: [split_fullname(f) for f in FULLNAMES]),
+        ('split_fullnames', lambda: split_fullnames(FULLNAMES)),
+    ]
+    for label, func in benchmarks:
+        best = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:<28} {:>10.1f} us per {} fullnames'.format(label, best * 1e6, len(FULLNAMES)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Microbenchmark of password generation
+
+    pip install -e . && python benchmarks/bench_generator.py
+"""
+from random import SystemRandom
+import timeit
+
+from rstr import Rstr
+
+from passpie import generator
+from passpie.config import DEFAULT
+
+PATTERNS = [DEFAULT['genpass_pattern'], r'[\w]{32}', r'(\w{4}-){3}\w{4}']
+rstr = Rstr(SystemRandom())
+
+
+def main(count=1000):
+    for pattern in PATTERNS:
+        print(u'{} ({:.1f} bits)'.format(pattern, generator.compile(pattern).entropy))
+        benchmarks = [
+            ('rstr.xeger', lambda: [rstr.xeger(pattern) for _ in range(count)]),
+            ('generator', lambda: generator.compile(pattern).generate_many(count)),
+        ]
+        for label, func in benchmarks:
+            best = min(timeit.repeat(func, number=1, repeat=3))
+            print('  {:<12} {:>10.1f} ms per {} passwords'.format(label, best * 1e3, count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""End to end benchmark of passpie commands on synthetic vaults
+
+Generates databases of growing size, times commands as separate
+processes, like a user running them, and writes JSON results that can
+be compared between commits:
+
+    pip install -e .
+    python benchmarks/bench_vault.py --output before.json
+    git checkout feature
+    python benchmarks/bench_vault.py --output after.json --compare before.json
+
+Vaults use a fake gpg that base64 armors passwords by default, so runs
+measure passpie itself. `--real-sizes` adds runs with real gpg keys.
+"""
+from __future__ import print_function
+from datetime import datetime, timedelta
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from passpie import config  # noqa
+from passpie.crypt import encrypt_many  # noqa
+from passpie.database import Database  # noqa
+from passpie.generator import compile as compile_pattern  # noqa
+
+
+FAKE_GPG = os.path.join(ROOT, 'benchmarks', 'fake_gpg.sh')
+PASSPHRASE = 'benchmark'
+RECIPIENT = 'benchmark@passpie.local'
+COMMANDS = ['list', 'search', 'add', 'update', 'remove', 'status_cold', 'status',
+            'export', 'import']
+NEW_FULLNAME = 'benchmark@new.example.com'
+
+
+def fake_armor(password):
+    encoded = base64.b64encode(password.encode('utf-8')).decode('ascii')
+    return u'-----BEGIN PGP MESSAGE-----\n\n{}\n-----END PGP MESSAGE-----\n'.format(encoded)
+
+
+def make_credentials(size, seed=0):
+    """Credentials spread over size / 10 names with 10% reused passwords
+    and modification times over the last two years
+    """
+    rand = random.Random(seed)
+    generator = compile_pattern(config.DEFAULT['genpass_pattern'])
+    now = datetime.now()
+    names = max(size // 10, 1)
+    credentials, passwords = [], []
+    for i in range(size):
+        if passwords and rand.random() < 0.1:
+            password = rand.choice(passwords)
+        else:
+            password = generator.generate()
+            passwords.append(password)
+        name = u'example{}.com'.format(i % names)
+        login = u'login{}'.format(i)
+        credentials.append({
+            'fullname': u'{}@{}'.format(login, name),
+            'name': name,
+            'login': login,
+            'password': password,
+            'comment': u'comment {}'.format(i) if i % 3 == 0 else u'',
+            'modified': now - timedelta(days=rand.randrange(730)),
+        })
+    return credentials
+
+
+class Environment(object):
+    """Isolated home, cache and PATH to run passpie processes in. With a
+    fake gpg, the fake script shadows any installed gpg
+    """
+
+    def __init__(self, workdir, fake):
+        self.workdir = workdir
+        self.fake = fake
+        self.home = os.path.join(workdir, 'home')
+        os.makedirs(self.home)
+        path = os.environ.get('PATH', '')
+        if fake:
+            bindir = os.path.join(workdir, 'bin')
+            os.makedirs(bindir)
+            for name in ('gpg', 'gpg2'):
+                os.symlink(FAKE_GPG, os.path.join(bindir, name))
+            path = bindir + os.pathsep + path
+        self.config_path = os.path.join(workdir, 'passpie.yml')
+        with open(self.config_path, 'w') as f:
+            f.write('key_length: 2048\n')
+        self.env = dict(os.environ, HOME=self.home, PATH=path,
+                        XDG_CACHE_HOME=os.path.join(workdir, 'cache'),
+                        PASSPIE_CONFIG=self.config_path,
+                        PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        for variable in ('PASSPIE_DATABASE', 'PASSPIE_AUTOPULL', 'PASSPIE_AUTOPUSH'):
+            self.env.pop(variable, None)
+
+    def run(self, path, *args):
+        command = [sys.executable, '-c', 'from passpie.cli import cli; cli()', '-D', path]
+        process = subprocess.Popen(command + list(args), env=self.env, cwd=self.workdir,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        _, error = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(u'passpie {} failed: {}'.format(
+                ' '.join(args), error.decode('utf-8', 'replace')))
+
+    def timed(self, path, *args):
+        start = time.time()
+        self.run(path, *args)
+        return time.time() - start
+
+    def init(self, path):
+        if self.fake:
+            self.run(path, 'init', '--recipient', RECIPIENT)
+        else:
+            self.run(path, 'init', '--passphrase', PASSPHRASE)
+
+
+def make_vault(env, path, size, seed=0):
+    """Initialize a database at path and fill it with size synthetic
+    credentials in one storage flush and one commit
+    """
+    env.init(path)
+    credentials = make_credentials(size, seed=seed)
+    configuration = dict(config.DEFAULT, path=path)
+    configuration.update(config.read(path))
+    configuration = config.Configuration(configuration)
+
+    passwords = [c['password'] for c in credentials]
+    if env.fake:
+        encrypted = [fake_armor(p) for p in passwords]
+    else:
+        encrypted = encrypt_many(passwords,
+                                 recipient=configuration['recipient'],
+                                 homedir=configuration['homedir'])
+    for cred, password in zip(credentials, encrypted):
+        cred['password'] = password
+
+    db = Database(configuration)
+    with db.buffered():
+        db.insert_multiple(credentials)
+    db.repo.commit(message=u'Generated {} credentials'.format(size))
+    return path
+
+
+def copy_empty(env, path, target):
+    """Empty database with the keys and configuration of path"""
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    os.makedirs(target)
+    for filename in ('.config', '.keys'):
+        if os.path.exists(os.path.join(path, filename)):
+            shutil.copy(os.path.join(path, filename), target)
+
+
+def bench_vault(env, path, commands, repeat):
+    """Time commands on the database at path. Mutating commands run in
+    add, update, remove order so the vault is left as it was
+    """
+    timings = {command: [] for command in commands}
+    exported = os.path.join(env.workdir, 'export.yml')
+    imported = os.path.join(env.workdir, 'imported')
+    status = ('status', '--passphrase', PASSPHRASE)
+
+    if 'status_cold' in commands:
+        timings['status_cold'].append(env.timed(path, *status))
+    for _ in range(repeat):
+        elapsed = {}
+        if 'list' in commands:
+            elapsed['list'] = env.timed(path, 'list')
+        if 'search' in commands:
+            elapsed['search'] = env.timed(path, 'search', 'name:example7.com')
+        if set(commands) & {'add', 'update', 'remove'}:
+            elapsed['add'] = env.timed(path, 'add', NEW_FULLNAME, '--password', 's3cr3t')
+            elapsed['update'] = env.timed(path, 'update', NEW_FULLNAME, '--comment', 'updated')
+            elapsed['remove'] = env.timed(path, 'remove', NEW_FULLNAME, '--yes')
+        if 'status' in commands:
+            elapsed['status'] = env.timed(path, *status)
+        if set(commands) & {'export', 'import'}:
+            elapsed['export'] = env.timed(path, 'export', exported, '--passphrase', PASSPHRASE)
+        if 'import' in commands:
+            copy_empty(env, path, imported)
+            elapsed['import'] = env.timed(imported, 'import', exported)
+        for command in set(commands) & set(elapsed):
+            timings[command].append(elapsed[command])
+    return timings
+
+
+def run(sizes, real_sizes, commands, repeat, keep=None):
+    results = {}
+    runs = [('fake', size) for size in sizes] + [('real', size) for size in real_sizes]
+    for gpg, size in runs:
+        workdir = tempfile.mkdtemp(prefix='passpie-bench-')
+        try:
+            env = Environment(workdir, fake=(gpg == 'fake'))
+            path = os.path.join(workdir, 'vault')
+            start = time.time()
+            make_vault(env, path, size)
+            print(u'{} gpg, {} credentials: generated in {:.1f}s'.format(
+                gpg, size, time.time() - start), file=sys.stderr)
+
+            for command, elapsed in sorted(bench_vault(env, path, commands, repeat).items()):
+                key = u'{}/{}/{}'.format(gpg, size, command)
+                results[key] = {'seconds': min(elapsed), 'runs': elapsed}
+                print(u'  {:<12} {:>9.3f}s'.format(command, min(elapsed)), file=sys.stderr)
+            if keep:
+                shutil.copytree(path, os.path.join(keep, u'{}-{}'.format(gpg, size)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def git_revision():
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                         stderr=subprocess.DEVNULL)
+        return output.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print timing ratios against baseline results and return keys that
+    got slower than threshold
+    """
+    regressions = []
+    for key in sorted(set(results) & set(baseline)):
+        before, after = baseline[key]['seconds'], results[key]['seconds']
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(u'{:<28} {:>9.3f}s -> {:>9.3f}s  {:>6.2f}x{}'.format(
+            key, before, after, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma separated vault sizes with the fake gpg')
+    parser.add_argument('--real-sizes', default='',
+                        help='comma separated vault sizes with real gpg keys')
+    parser.add_argument('--commands', default=','.join(COMMANDS),
+                        help='comma separated commands from: {}'.format(', '.join(COMMANDS)))
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each command')
+    parser.add_argument('--output', help='write JSON results to file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown ratio reported as regression')
+    parser.add_argument('--keep', help='copy generated vaults to this directory')
+    args = parser.parse_args(argv)
+
+    def sizes(text):
+        return [int(size) for size in text.split(',') if size]
+
+    commands = [c for c in args.commands.split(',') if c]
+    unknown = set(commands) - set(COMMANDS)
+    if unknown:
+        parser.error(u'unknown commands: {}'.format(', '.join(sorted(unknown))))
+
+    results = run(sizes(args.sizes), sizes(args.real_sizes), commands, args.repeat,
+                  keep=args.keep)
+    report = {
+        'revision': git_revision(),
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,31 @@
+#!/bin/sh
+# Stand-in for gpg in benchmarks. "Encrypts" by base64 armoring stdin so
+# runs measure passpie rather than public key cryptography
+action=
+file=-
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --encrypt) action=encrypt ;;
+        --decrypt) action=decrypt; [ $# -gt 1 ] && file=$2 ;;
+        --list-public-keys|--list-secret-keys) action=list ;;
+    esac
+    shift
+done
+
+case "$action" in
+    encrypt)
+        echo "-----BEGIN PGP MESSAGE-----"
+        echo
+        base64
+        echo "-----END PGP MESSAGE-----"
+        ;;
+    decrypt)
+        grep -v -e '^-----' -e '^$' "$file" | base64 -d
+        ;;
+    list)
+        echo "      Key fingerprint = 0000 1111 2222 3333 4444  5555 6666 7777 8888 9999"
+        ;;
+    *)
+        cat > /dev/null
+        ;;
+esac
@@ -0,0 +1,101 @@
+import hashlib
+import mmap
+import struct
+
+
+HASH_LENGTHS = {40: 'sha1', 32: 'ntlm'}
+
+
+class CorpusError(ValueError):
+    pass
+
+
+def md4(data):
+    """MD4 digest, for NTLM hashes when hashlib has no md4"""
+    def rotate(x, n):
+        return ((x << n) | (x >> (32 - n))) & 0xffffffff
+
+    length = len(data)
+    data += b'\x80' + b'\x00' * ((55 - length) % 64) + struct.pack('<Q', length * 8)
+    state = [0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476]
+    rounds = [
+        (lambda x, y, z: (x & y) | (~x & z), 0, range(16), (3, 7, 11, 19)),
+        (lambda x, y, z: (x & y) | (x & z) | (y & z), 0x5a827999,
+         [0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15], (3, 5, 9, 13)),
+        (lambda x, y, z: x ^ y ^ z, 0x6ed9eba1,
+         [0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15], (3, 9, 11, 15)),
+    ]
+    for offset in range(0, len(data), 64):
+        words = struct.unpack('<16I', data[offset:offset + 64])
+        a, b, c, d = state
+        for function, constant, order, shifts in rounds:
+            for i, k in enumerate(order):
+                a = rotate((a + function(b, c, d) + words[k] + constant) & 0xffffffff,
+                           shifts[i % 4])
+                a, b, c, d = d, a, b, c
+        state = [(x + y) & 0xffffffff for x, y in zip(state, (a, b, c, d))]
+    return struct.pack('<4I', *state)
+
+
+def hash_password(password, algorithm):
+    if algorithm == 'ntlm':
+        data = password.encode('utf-16-le')
+        try:
+            digest = hashlib.new('md4', data).digest()
+        except ValueError:
+            digest = md4(data)
+        return digest.hex().upper()
+    return hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+
+
+class Corpus(object):
+    """Breached password hashes in a file sorted by hash, one `HASH:COUNT`
+    line each as in the downloadable Have I Been Pwned files. The file is
+    memory mapped and binary searched, so it is never read into memory
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise CorpusError(u'Empty breach corpus: {}'.format(path))
+        first = self.map[:self.map.find(b'\n')].split(b':')[0].strip()
+        if len(first) not in HASH_LENGTHS:
+            self.close()
+            raise CorpusError(u'Unknown hash format in breach corpus: {}'.format(path))
+        self.algorithm = HASH_LENGTHS[len(first)]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def lookup(self, digest):
+        """Return the breach count of an uppercase hex digest, 0 if absent"""
+        target = digest.encode('ascii')
+        low, high = 0, len(self.map)
+        while low < high:
+            middle = (low + high) // 2
+            start = self.map.rfind(b'\n', 0, middle) + 1
+            end = self.map.find(b'\n', middle)
+            end = len(self.map) if end < 0 else end
+            line = self.map[start:end]
+            value, _, count = line.partition(b':')
+            value = value.strip().upper()
+            if value == target:
+                return int(count.strip() or 1)
+            elif value < target:
+                low = end + 1
+            else:
+                high = start
+        return 0
+
+    def count(self, password):
+        return self.lookup(hash_password(password, self.algorithm))
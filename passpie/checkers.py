@@ -1,26 +1,113 @@
-from copy import deepcopy
 from datetime import datetime, timedelta
+from itertools import islice
 
 
-def repeated(credentials, limit):
-    result_credentials = deepcopy(credentials)
-    for i, cred in enumerate(credentials):
-        rep = [c['fullname'] for c in credentials
-               if cred['password'] == c['password'] and
-               cred['fullname'] != c['fullname']][:limit]
-        if not rep:
-            rep = None
-        result_credentials[i]['repeated'] = rep
+def repeated(credentials, limit, field='password'):
+    groups = {}
+    for cred in credentials:
+        groups.setdefault(cred[field], []).append(cred['fullname'])
+
+    result_credentials = []
+    for cred in credentials:
+        others = (f for f in groups[cred[field]] if f != cred['fullname'])
+        rep = list(islice(others, limit))
+        result_credentials.append(dict(cred, repeated=rep if rep else None))
     return result_credentials
 
 
 def modified(credentials, days):
-    result_credentials = deepcopy(credentials)
-    for i, cred in enumerate(credentials):
-        modified_delta = (datetime.now() - cred["modified"])
+    now = datetime.now()
+    result_credentials = []
+    for cred in credentials:
+        modified_delta = (now - cred["modified"])
         if modified_delta > timedelta(days=days):
             modified_time = "{} days ago".format(modified_delta.days)
         else:
             modified_time = None
-        result_credentials[i]['modified'] = modified_time
+        result_credentials.append(dict(cred, modified=modified_time))
+    return result_credentials
+
+
+def weak(credentials, min_score, field='score'):
+    result_credentials = []
+    for cred in credentials:
+        score = cred.get(field)
+        if score is not None and score < min_score:
+            strength = "{}/4".format(score)
+        else:
+            strength = None
+        result_credentials.append(dict(cred, strength=strength))
+    return result_credentials
+
+
+def levenshtein(a, b, limit=None):
+    """Edit distance between a and b. With a limit, stops early and returns
+    limit + 1 once the distance is known to exceed it
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def deletions(word, distance):
+    variants = frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants = variants | frontier
+    return variants
+
+
+class DeletionIndex(object):
+    """Index words by their variants with up to `distance` characters
+    deleted. Words within that edit distance share a variant, so searches
+    only compare words found in the buckets of their own variants
+    """
+
+    def __init__(self, words, distance):
+        self.distance = distance
+        self.buckets = {}
+        for word in words:
+            for variant in deletions(word, distance):
+                self.buckets.setdefault(variant, set()).add(word)
+
+    def search(self, word):
+        """Return (distance, word) pairs within distance of word"""
+        candidates = set()
+        for variant in deletions(word, self.distance):
+            candidates.update(self.buckets.get(variant, ()))
+        found = []
+        for candidate in candidates:
+            d = levenshtein(word, candidate, limit=self.distance)
+            if d <= self.distance:
+                found.append((d, candidate))
+        return sorted(found)
+
+
+def similar(credentials, limit, distance=2, min_length=6, field='password'):
+    """List other fullnames whose passwords are different but within an edit
+    distance of each credential's password
+    """
+    groups = {}
+    for cred in credentials:
+        groups.setdefault(cred[field], []).append(cred['fullname'])
+    passwords = [p for p in groups if len(p) >= min_length]
+    index = DeletionIndex(passwords, distance)
+    neighbors = {p: [other for d, other in index.search(p) if d > 0] for p in passwords}
+
+    result_credentials = []
+    for cred in credentials:
+        others = (f for p in neighbors.get(cred[field], []) for f in groups[p])
+        sim = list(islice(others, limit))
+        result_credentials.append(dict(cred, similar=sim if sim else None))
     return result_credentials
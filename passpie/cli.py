@@ -1,24 +1,27 @@
-from functools import wraps
-import json
+from functools import partial, wraps
+from itertools import islice
+import io
 import logging
 import os
 import shutil
 import sys
 
 import click
-import yaml
 
-from . import clipboard, completion, config, checkers, importers
-from .crypt import create_keys, encrypt, decrypt
+from . import completion, config
+from .credential import make_fullname, split_fullname
+from .crypt import create_keys, encrypt, encrypt_many, decrypt, decrypt_many
 from .database import Database
-from .table import Table
+from .table import Table, OUTPUT_FORMATS
 from .utils import genpass, ensure_dependencies
 from .history import clone
-from .validators import validate_config, validate_cols, validate_remote
+from .validators import (validate_config, validate_cols, validate_remote,
+                         validate_importer, validate_env, validate_query)
 
 
 __version__ = "1.6.2"
 pass_db = click.make_pass_decorator(Database, ensure=False)
+STATUS_CACHE_FILENAME = '.status_cache'
 logging.basicConfig(format="[%(levelname)s:passpie.%(module)s]: %(message)s")
 
 
@@ -38,6 +41,73 @@ def ensure_passphrase(passphrase, config):
         raise click.ClickException(click.style(message, fg='red'))
 
 
+def fingerprint_key(db, passphrase=None, create=False):
+    """Key of password fingerprints, stored encrypted for the database
+    recipient. The plain key is only kept in memory, by `passpie serve`
+    for its warm database, so it is known when created, decrypted with
+    passphrase or held by the server, and None otherwise. Commands that
+    commit create the key when missing
+    """
+    from . import fingerprint
+
+    keypath = os.path.join(db.path, fingerprint.KEY_FILENAME)
+    if os.path.exists(keypath):
+        with open(keypath) as f:
+            encrypted = f.read()
+        if encrypted not in db.fingerprint_keys and passphrase is not None:
+            db.fingerprint_keys[encrypted] = decrypt(encrypted,
+                                                     recipient=db.config['recipient'],
+                                                     passphrase=passphrase,
+                                                     homedir=db.config['homedir']).strip()
+        return db.fingerprint_keys.get(encrypted)
+    elif create and os.path.isdir(db.path):
+        key = fingerprint.generate_key()
+        encrypted = encrypt(key, recipient=db.config['recipient'], homedir=db.config['homedir'])
+        if encrypted:
+            with open(keypath, 'w') as f:
+                f.write(encrypted)
+            db.storage.written.add(keypath)
+            db.fingerprint_keys[encrypted] = key
+            return key
+
+
+def read_status_cache(db, passphrase):
+    """Per credential analysis of previous status runs, keyed by the
+    digest of the encrypted password
+    """
+    filename = os.path.join(db.path, STATUS_CACHE_FILENAME)
+    if not os.path.exists(filename):
+        return {}
+    import json
+    with open(filename) as f:
+        decrypted = decrypt(f.read(),
+                            recipient=db.config['recipient'],
+                            passphrase=passphrase,
+                            homedir=db.config['homedir'])
+    try:
+        return json.loads(decrypted)
+    except ValueError:
+        logging.debug('ignoring unreadable status cache')
+        return {}
+
+
+def write_status_cache(db, cache):
+    import json
+    db.repo.exclude(STATUS_CACHE_FILENAME)
+    encrypted = encrypt(json.dumps(cache),
+                        recipient=db.config['recipient'],
+                        homedir=db.config['homedir'])
+    with open(os.path.join(db.path, STATUS_CACHE_FILENAME), 'w') as f:
+        f.write(encrypted)
+
+
+def make_fingerprint(db, password):
+    from . import fingerprint
+
+    key = fingerprint_key(db, create=True)
+    return fingerprint.make(key, password) if key else None
+
+
 def logging_exception(exceptions=[Exception]):
     def decorator(func):
         @wraps(func)
@@ -84,16 +154,22 @@ class AliasGroup(click.Group):
               envvar="PASSPIE_CONFIG")
 @click.option('-v', '--verbose', help='Activate verbose output', count=True,
               envvar="PASSPIE_VERBOSE")
+@click.option('--at', 'revision', help='Read database as of git revision')
 @click.version_option(version=__version__)
 @click.pass_context
-def cli(ctx, path, autopull, autopush, configuration, verbose):
+def cli(ctx, path, autopull, autopush, configuration, verbose, revision):
     try:
         ensure_dependencies()
     except RuntimeError as e:
         raise click.ClickException(click.style(str(e), fg='red'))
 
-    # Setup database
-    db = Database(configuration)
+    # Setup database, `passpie serve` passes its warm database as obj
+    # which is reused only when the request resolves the same configuration
+    if revision:
+        configuration['revision'] = revision
+    db = ctx.obj
+    if db is None or db.config.options != configuration.options or revision:
+        db = Database(configuration)
     ctx.obj = db
 
     # Verbose
@@ -122,12 +198,24 @@ def complete(ctx, db, shell_name):
 
 
 @cli.command(name='list')
+@click.option('-f', '--format', 'output_format', type=click.Choice(OUTPUT_FORMATS),
+              default='table', help="Output format")
+@click.option('--limit', type=click.IntRange(min=0), help="Show at most limit credentials")
+@click.option('--offset', type=click.IntRange(min=0), default=0, help="Skip offset credentials")
+@click.option('--pager', is_flag=True, help="Show output through the system pager")
+@click.option('--older-than', type=click.IntRange(min=0), metavar='DAYS',
+              help="Only credentials not modified in the last days")
 @logging_exception()
 @pass_db
-def list_database(db):
+def list_database(db, output_format, limit, offset, pager, older_than):
     """Print credential as a table"""
-    credentials = db.credentials()
-    if credentials:
+    stop = offset + limit if limit is not None else None
+    if older_than is not None:
+        credentials = db.find(u'modified:>{}d'.format(older_than))
+    else:
+        credentials = db.iter_credentials()
+    credentials = islice(credentials, offset, stop)
+    if output_format == 'table':
         table = Table(
             db.config['headers'],
             table_format=db.config['table_format'],
@@ -135,7 +223,18 @@ def list_database(db):
             hidden=db.config['hidden'],
             hidden_string=db.config['hidden_string'],
         )
-        click.echo(table.render(credentials))
+        lines = table.render_rows(credentials)
+    else:
+        table = Table(db.config['headers'],
+                      hidden=db.config['hidden'],
+                      hidden_string=db.config['hidden_string'])
+        lines = table.stream(credentials, output_format)
+
+    if pager:
+        click.echo_via_pager(u'{}\n'.format(line) for line in lines)
+    else:
+        for line in lines:
+            click.echo(line)
 
 
 @cli.command(name="config")
@@ -145,6 +244,8 @@ def list_database(db):
 @pass_db
 def check_config(db, level):
     """Show current configuration for shell"""
+    import yaml
+
     if level == 'global':
         configuration = config.read(config.HOMEDIR, '.passpierc')
     elif level == 'local':
@@ -153,7 +254,7 @@ def check_config(db, level):
         configuration = db.config
 
     if configuration:
-        click.echo(yaml.safe_dump(configuration, default_flow_style=False))
+        click.echo(yaml.safe_dump(dict(configuration), default_flow_style=False))
 
 
 @cli.command(help="Initialize new passpie database")
@@ -219,6 +320,8 @@ def init(db, force, clone_repo, recipient, no_git, passphrase):
 @logging_exception()
 @pass_db
 def add(db, fullname, password, random, pattern, interactive, comment, force, copy):
+    from . import clipboard
+
     if random or pattern:
         pattern = pattern if pattern else db.config['genpass_pattern']
         password = genpass(pattern=pattern)
@@ -236,7 +339,8 @@ def add(db, fullname, password, random, pattern, interactive, comment, force, co
         raise click.ClickException(click.style(message, fg='yellow'))
 
     encrypted = encrypt(password, recipient=db.config['recipient'], homedir=db.config['homedir'])
-    db.add(fullname=fullname, password=encrypted, comment=comment)
+    db.add(fullname=fullname, password=encrypted, comment=comment,
+           fingerprint=make_fingerprint(db, password))
 
     if interactive:
         click.edit(filename=db.filename(fullname))
@@ -246,7 +350,7 @@ def add(db, fullname, password, random, pattern, interactive, comment, force, co
         click.secho('Password copied to clipboard', fg='yellow')
 
     message = u'Added {}{}'.format(fullname, ' [--force]' if force else '')
-    db.repo.commit(message=message)
+    db.commit(message)
 
 
 @cli.command(help="Copy credential password to clipboard/stdout")
@@ -259,6 +363,8 @@ def add(db, fullname, password, random, pattern, interactive, comment, force, co
 @logging_exception()
 @pass_db
 def copy(db, fullname, passphrase, to, clear):
+    from . import clipboard
+
     ensure_passphrase(passphrase, db.config)
     clear = clear if clear else db.config['copy_timeout']
     credential = db.credential(fullname)
@@ -279,6 +385,65 @@ def copy(db, fullname, passphrase, to, clear):
         click.echo(decrypted)
 
 
+def find_credentials(db, fullnames):
+    credentials = []
+    for fullname, credential in zip(fullnames, db.credentials_many(fullnames)):
+        if not credential:
+            message = u"Credential '{}' not found".format(fullname)
+            raise click.ClickException(click.style(message, fg='red'))
+        credentials.append(credential)
+    return credentials
+
+
+@cli.command(help="Print passwords of many credentials to stdout")
+@click.argument("fullnames", nargs=-1)
+@click.option("-q", "--query", help="Also get credentials matching regular expression")
+@click.option("--passphrase", prompt="Passphrase", hide_input=True)
+@logging_exception()
+@pass_db
+def get(db, fullnames, query, passphrase):
+    credentials = find_credentials(db, fullnames)
+    if query:
+        found = set(c['fullname'] for c in credentials)
+        credentials += [c for c in db.matches(query) if c['fullname'] not in found]
+    if not credentials:
+        return
+
+    ensure_passphrase(passphrase, db.config)
+    passwords = decrypt_many([c['password'] for c in credentials],
+                             recipient=db.config['recipient'],
+                             passphrase=passphrase,
+                             homedir=db.config['homedir'])
+    if len(fullnames) == 1 and not query:
+        click.echo(passwords[0])
+    else:
+        for credential, password in zip(credentials, passwords):
+            click.echo(u"{}\t{}".format(credential['fullname'], password))
+
+
+@cli.command(help="Run command with credentials passwords in environment",
+             context_settings={'ignore_unknown_options': True})
+@click.option("-e", "--env", "variables", multiple=True, callback=validate_env,
+              help="Environment variable set to a password as VAR=fullname")
+@click.option("--passphrase", prompt="Passphrase", hide_input=True)
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+@logging_exception()
+@pass_db
+def run(db, variables, passphrase, command):
+    import subprocess
+
+    credentials = find_credentials(db, [fullname for _, fullname in variables])
+    env = dict(os.environ)
+    if credentials:
+        ensure_passphrase(passphrase, db.config)
+        passwords = decrypt_many([c['password'] for c in credentials],
+                                 recipient=db.config['recipient'],
+                                 passphrase=passphrase,
+                                 homedir=db.config['homedir'])
+        env.update((name, password) for (name, _), password in zip(variables, passwords))
+    sys.exit(subprocess.call(list(command), env=env))
+
+
 @cli.command(help="Update credential")
 @click.argument("fullname")
 @click.option("--name", help="Credential new name")
@@ -323,11 +488,12 @@ def update(db, fullname, name, login, password, random, interactive, pattern, co
             encrypted = encrypt(values["password"],
                                 recipient=db.config['recipient'],
                                 homedir=db.config['homedir'])
+            values['fingerprint'] = make_fingerprint(db, values['password'])
             values['password'] = encrypted
         db.update(fullname=fullname, values=values)
         if interactive:
             click.edit(filename=db.filename(fullname))
-        db.repo.commit(u'Updated {}'.format(credential['fullname']))
+        db.commit(u'Updated {}'.format(credential['fullname']))
 
 
 @cli.command(help="Remove credential")
@@ -350,82 +516,276 @@ def remove(db, fullname, yes):
             db.remove(credential['fullname'])
 
         fullnames = ', '.join(c['fullname'] for c in credentials)
-        db.repo.commit(u'Removed {}'.format(fullnames))
+        db.commit(u'Removed {}'.format(fullnames))
 
 
-@cli.command(help="Search credentials by regular expressions")
-@click.argument("regex")
+@cli.command()
+@click.argument("query", callback=validate_query)
+@click.option('-f', '--format', 'output_format', type=click.Choice(OUTPUT_FORMATS),
+              default='table', help="Output format")
 @logging_exception()
 @pass_db
-def search(db, regex):
-    credentials = db.matches(regex)
-    if credentials:
+def search(db, query, output_format):
+    """Search credentials by query or regular expression
+
+    Queries are terms like `name:example.com login:~^ci- modified:<90d
+    comment:"prod"`. Terms without a field are regular expressions matched
+    on name, login and comment.
+    """
+    credentials = db.find(query)
+    if output_format != 'table':
+        table = Table(db.config['headers'],
+                      hidden=db.config['hidden'],
+                      hidden_string=db.config['hidden_string'])
+        for line in table.stream(credentials, output_format):
+            click.echo(line)
+    elif credentials:
         table = Table(
             db.config['headers'],
             table_format=db.config['table_format'],
             colors=db.config['colors'],
-            hidden=['password']
+            hidden=db.config['hidden'],
+            hidden_string=db.config['hidden_string'],
         )
         click.echo(table.render(credentials))
 
 
+@cli.command(help="Pick a credential with an interactive fuzzy finder")
+@click.argument("query", default='', required=False)
+@click.option("--show", is_flag=True, help="Show selected credential instead of copying")
+@click.option("--fullname", "print_fullname", is_flag=True, help="Print selected fullname")
+@click.option("--filter", "filter_only", is_flag=True,
+              help="Print fullnames ranked by query without interaction")
+@click.option("--to", default='clipboard', type=click.Choice(['stdout', 'clipboard']),
+              help="Copy password destination")
+@click.option("--passphrase", help="Passphrase to copy the selected password")
+@logging_exception()
+@pass_db
+@click.pass_context
+def pick(ctx, db, query, show, print_fullname, filter_only, to, passphrase):
+    from . import fuzzy
+
+    finder = fuzzy.Finder(db.index().documents.values(), key=lambda c: u' '.join(
+        t for t in (c['fullname'], c.get('comment')) if t))
+    if filter_only:
+        for credential in finder.search(query):
+            click.echo(credential['fullname'])
+        return
+
+    credential = fuzzy.pick(finder, query)
+    if credential is None:
+        raise click.Abort()
+    elif print_fullname:
+        click.echo(credential['fullname'])
+    elif show:
+        table = Table(db.config['headers'],
+                      table_format=db.config['table_format'],
+                      colors=db.config['colors'],
+                      hidden=db.config['hidden'],
+                      hidden_string=db.config['hidden_string'])
+        click.echo(table.render([dict(credential)]))
+    else:
+        if passphrase is None:
+            passphrase = click.prompt('Passphrase', hide_input=True)
+        ctx.invoke(copy, fullname=credential['fullname'], passphrase=passphrase, to=to, clear=0)
+
+
+def score_credentials(db, credentials, passphrase, decrypt_all=False):
+    """Set fingerprint and strength score of credentials and return plain
+    passwords of decrypted credentials, all of them with decrypt_all. Only
+    credentials without a fingerprint of the current key or a score,
+    stored or cached by previous runs, are decrypted. Plain passwords are
+    compared when there is no key
+    """
+    from . import fingerprint, strength
+
+    key = fingerprint_key(db, passphrase)
+    cache = read_status_cache(db, passphrase) if key else {}
+
+    def fingerprinted(cred):
+        return bool(key) and fingerprint.is_valid(cred.get('fingerprint'), key)
+
+    for cred in credentials:
+        cached = cache.get(fingerprint.digest(cred['password']), {})
+        if key and not fingerprinted(cred):
+            cred['fingerprint'] = cached.get('fingerprint')
+        cred['score'] = cached.get('score')
+    if decrypt_all:
+        missing = credentials
+    else:
+        missing = [c for c in credentials if c['score'] is None or not fingerprinted(c)]
+
+    passwords = decrypt_many([c['password'] for c in missing],
+                             recipient=db.config['recipient'],
+                             passphrase=passphrase,
+                             homedir=db.config['homedir'])
+    scores = strength.score_many(passwords)
+    for cred, password, score in zip(missing, passwords, scores):
+        if not fingerprinted(cred):
+            cred['fingerprint'] = fingerprint.make(key, password) if key else password
+        cred['score'] = score
+
+    if key:
+        analysis = {fingerprint.digest(c['password']):
+                    {'fingerprint': c['fingerprint'], 'score': c['score']}
+                    for c in credentials}
+        if analysis != cache:
+            write_status_cache(db, analysis)
+    return passwords
+
+
+def find_similar(credentials, passwords, limit):
+    from . import checkers
+
+    plain = [dict(c, password=p) for c, p in zip(credentials, passwords)]
+    for cred, result in zip(credentials, checkers.similar(plain, limit)):
+        cred['similar'] = result['similar']
+
+
+def find_breached(credentials, passwords, path):
+    from .breach import Corpus
+
+    with Corpus(path) as corpus:
+        for cred, password in zip(credentials, passwords):
+            count = corpus.count(password)
+            cred['breached'] = u'{} times'.format(count) if count else None
+
+
+def render_status(db, credentials, columns):
+    for cred in credentials:
+        for column in columns[1:]:
+            if cred.get(column):
+                cred[column] = click.style(str(cred[column]), 'red')
+    table = Table(columns,
+                  table_format=db.config['table_format'],
+                  missing=click.style('OK', 'green'))
+    click.echo(table.render(credentials))
+
+
 @cli.command(help="Diagnose database for improvements")
 @click.option("--full", is_flag=True, help="Show all entries")
 @click.option("--days", default=90, type=int, help="Elapsed days")
-@click.option("--passphrase", prompt="Passphrase", hide_input=True)
+@click.option("--min-score", type=click.IntRange(0, 4),
+              help="Flag passwords scoring less than this from 0 to 4")
+@click.option("--similar", is_flag=True,
+              help="Find similar passwords, decrypting all credentials")
+@click.option("--breached", type=click.Path(exists=True, dir_okay=False),
+              help="Sorted file of breached password hashes to check passwords against")
+@click.option("--only-age", is_flag=True,
+              help="Only show credentials older than days, without decrypting")
+@click.option("--passphrase", help="Database passphrase")
 @logging_exception()
 @pass_db
-def status(db, full, days, passphrase):
+def status(db, full, days, min_score, similar, breached, only_age, passphrase):
+    from . import checkers
+
+    if only_age:
+        # modification times are not encrypted, the modified index is enough
+        credentials = checkers.modified(db.find(u'modified:>{}d'.format(days)), days)
+        if credentials:
+            render_status(db, credentials, ['fullname', 'modified'])
+        return
+
+    if passphrase is None:
+        passphrase = click.prompt('Passphrase', hide_input=True)
     ensure_passphrase(passphrase, db.config)
+    if min_score is None:
+        min_score = db.config['status_min_score']
     credentials = db.credentials()
+    if not credentials:
+        return
+
+    passwords = score_credentials(db, credentials, passphrase, decrypt_all=similar or breached)
+    limit = db.config['status_repeated_passwords_limit']
+    columns = ['fullname', 'repeated', 'modified', 'strength']
+    if similar:
+        find_similar(credentials, passwords, limit)
+        columns.append('similar')
+    if breached:
+        find_breached(credentials, passwords, breached)
+        columns.append('breached')
+    credentials = checkers.repeated(credentials, limit, field='fingerprint')
+    credentials = checkers.modified(credentials, days)
+    credentials = checkers.weak(credentials, min_score)
+    render_status(db, credentials, columns)
+
+
+@cli.command(help="Generate new random passwords for credentials matching query")
+@click.argument("query", callback=validate_query)
+@click.option("--pattern", help="Random password generator regex pattern")
+@click.option("--dry-run", is_flag=True, help="Show credentials to rotate without changing them")
+@click.option("--report", type=click.File("w"),
+              help="Write a JSON report of rotated fullnames, never passwords")
+@logging_exception()
+@pass_db
+def rotate(db, query, pattern, dry_run, report):
+    from . import fingerprint, generator
+
+    credentials = db.find(query)
+    pattern = pattern if pattern else db.config['genpass_pattern']
+    if credentials and not dry_run:
+        try:
+            passwords = generator.compile(pattern).generate_many(len(credentials))
+        except generator.UnsupportedPattern:
+            passwords = [genpass(pattern=pattern) for _ in credentials]
+        encrypted = encrypt_many(passwords,
+                                 recipient=db.config['recipient'],
+                                 homedir=db.config['homedir'])
+        key = fingerprint_key(db, create=True)
+        with db.buffered():
+            for cred, password, encrypted_password in zip(credentials, passwords, encrypted):
+                values = dict(cred, password=encrypted_password)
+                values['fingerprint'] = fingerprint.make(key, password) if key else None
+                db.update(fullname=cred['fullname'], values=values)
+        db.commit(u'Rotated {} credentials'.format(len(credentials)))
 
     for cred in credentials:
-        decrypted = decrypt(cred['password'],
-                            recipient=db.config['recipient'],
-                            passphrase=passphrase,
-                            homedir=db.config['homedir'])
-        cred["password"] = decrypted
-
-    if credentials:
-        limit = db.config['status_repeated_passwords_limit']
-        credentials = checkers.repeated(credentials, limit)
-        credentials = checkers.modified(credentials, days)
-
-        for c in credentials:
-            if c['repeated']:
-                c['repeated'] = click.style(str(c['repeated']), 'red')
-            if c['modified']:
-                c['modified'] = click.style(str(c['modified']), 'red')
-
-        table = Table(['fullname', 'repeated', 'modified'],
-                      table_format=db.config['table_format'],
-                      missing=click.style('OK', 'green'))
-        click.echo(table.render(credentials))
+        click.echo(cred['fullname'])
+    if report:
+        import json
+        try:
+            entropy = round(generator.compile(pattern).entropy, 1)
+        except ValueError:
+            entropy = None
+        json.dump({'dry_run': dry_run,
+                   'entropy': entropy,
+                   'rotated': [{'from': c['fullname'], 'to': make_fullname(c['login'], c['name'])}
+                               for c in credentials]},
+                  report, indent=2)
+        report.write(u'\n')
 
 
 @cli.command(name="import", help="Import credentials from path")
 @click.argument("filepath", type=click.Path(readable=True, exists=True))
-@click.option("-I", "--importer", type=click.Choice(importers.get_names()),
+@click.option("-I", "--importer", callback=validate_importer,
               help="Specify an importer")
 @click.option("--cols", help="CSV expected columns", callback=validate_cols)
 @pass_db
 def import_database(db, filepath, importer, cols):
+    from . import fingerprint, importers
+
     if cols:
         importer = importers.get(name='csv')
         kwargs = {'cols': cols}
+    elif importer:
+        importer = importers.get(name=importer)
+        kwargs = {}
     else:
         importer = importers.find_importer(filepath)
         kwargs = {}
 
     if importer:
         credentials = importer.handle(filepath, **kwargs)
+        key = fingerprint_key(db, create=True)
         for cred in credentials:
+            if key:
+                cred['fingerprint'] = fingerprint.make(key, cred['password'])
             encrypted = encrypt(cred['password'],
                                 recipient=db.config['recipient'],
                                 homedir=db.config['homedir'])
             cred['password'] = encrypted
         db.insert_multiple(credentials)
-        db.repo.commit(message=u'Imported credentials from {}'.format(filepath))
+        db.commit(u'Imported credentials from {}'.format(filepath))
 
 
 @cli.command(name="export", help="Export credentials in plain text")
@@ -435,6 +795,8 @@ def import_database(db, filepath, importer, cols):
 @logging_exception()
 @pass_db
 def export_database(db, filepath, as_json, passphrase):
+    import yaml
+
     ensure_passphrase(passphrase, db.config)
     credentials = db.all()
 
@@ -444,8 +806,10 @@ def export_database(db, filepath, as_json, passphrase):
                             passphrase=passphrase,
                             homedir=db.config['homedir'])
         cred["password"] = decrypted
+        cred.pop("fingerprint", None)
 
     if as_json:
+        import json
         for cred in credentials:
             cred["modified"] = str(cred["modified"])
         dict_content = {
@@ -470,9 +834,13 @@ def export_database(db, filepath, as_json, passphrase):
 @logging_exception()
 @pass_db
 def reset(db, passphrase):
+    from . import fingerprint
+
     ensure_passphrase(passphrase, db.config)
     credentials = db.credentials()
     if credentials:
+        key = fingerprint_key(db, passphrase)
+
         # decrypt all credentials
         for cred in credentials:
             decrypted = decrypt(cred['password'],
@@ -488,18 +856,27 @@ def reset(db, passphrase):
                                           confirmation_prompt=True)
             create_keys(new_passphrase)
 
-        # encrypt passwords
+        # encrypt passwords and fingerprint key
         for cred in credentials:
+            if key:
+                cred['fingerprint'] = fingerprint.make(key, cred['password'])
             cred['password'] = encrypt(cred['password'],
                                        recipient=db.config['recipient'],
                                        homedir=db.config['homedir'])
+        if key:
+            encrypted = encrypt(key, recipient=db.config['recipient'], homedir=db.config['homedir'])
+            keypath = os.path.join(db.path, fingerprint.KEY_FILENAME)
+            with open(keypath, 'w') as f:
+                f.write(encrypted)
+            db.storage.written.add(keypath)
+            db.fingerprint_keys[encrypted] = key
 
         # remove old and insert re-encrypted credentials
-        db.purge()
+        db.truncate()
         db.insert_multiple(credentials)
 
         # commit
-        db.repo.commit(message='Reset database')
+        db.commit('Reset database')
 
 
 @cli.command(help='Remove all credentials from database')
@@ -513,27 +890,228 @@ def purge(db, yes):
             yes = click.confirm(click.style(alert, 'yellow'), abort=True)
         if yes:
             db.purge()
-            db.repo.commit(message='Purged database')
+            db.commit('Purged database')
+
+
+class ServeInput(io.BytesIO):
+    """Stdin of served commands. The server has no terminal, so reading
+    input aborts commands and clients run them again locally
+    """
+
+    def read(self, size=-1):
+        if size == 0:
+            return b''
+        raise click.Abort()
+
+    read1 = readline = read
+
+    def readinto(self, buffer):
+        raise click.Abort()
+
+
+def serve_command(db, args):
+    """Resolve the command name in args the way cli would, with aliases"""
+    try:
+        ctx = cli.make_context('passpie', list(args), obj=db, resilient_parsing=True)
+        if ctx.protected_args:
+            name, _, _ = cli.resolve_command(ctx, ctx.protected_args + ctx.args)
+            return name
+    except click.ClickException:
+        pass
+    return None
+
+
+def serve_invoke(db, args, env=None, cwd=None, color=False):
+    """Run a command requested by a `passpie serve` client. Commands that
+    need the client terminal return a null exit code to run on the client
+    """
+    from click.testing import CliRunner
+    from .server import is_local
+
+    if is_local(serve_command(db, args), args):
+        return u'', None
+    db.refresh()
+    request_env = {k: None for k in os.environ if k.startswith('PASSPIE_')}
+    request_env.update(env or {})
+    workdir = os.getcwd()
+    os.chdir(cwd or workdir)
+    try:
+        result = CliRunner().invoke(cli, args, input=ServeInput(), obj=db, env=request_env,
+                                    color=color, prog_name='passpie')
+    finally:
+        os.chdir(workdir)
+    return result.output, result.exit_code
+
+
+@cli.command(help='Serve commands from a warm database over a unix socket')
+@click.option('--socket', 'socket_path', help='Unix socket path',
+              envvar='PASSPIE_SOCKET')
+@logging_exception()
+@pass_db
+def serve(db, socket_path):
+    from . import server
+
+    if not server.is_supported():
+        raise click.ClickException(click.style('unix sockets not supported', fg='red'))
+
+    # warm up keyring before the first request
+    db.config['recipient']
+    socket_path = socket_path if socket_path else server.socket_path()
+    click.echo(u'Serving {} on {}'.format(db.path, socket_path))
+    server.serve(socket_path, partial(serve_invoke, db))
+
+
+def batch_add(db, operation):
+    fullname = operation['fullname']
+    password = operation.get('password', '')
+    if operation.get('random') or operation.get('pattern'):
+        password = genpass(pattern=operation.get('pattern') or db.config['genpass_pattern'])
+    if db.credential(fullname=fullname) and not operation.get('force'):
+        raise ValueError(u"Credential {} already exists".format(fullname))
+    encrypted = encrypt(password, recipient=db.config['recipient'], homedir=db.config['homedir'])
+    if not db.add(fullname=fullname, password=encrypted, comment=operation.get('comment', ''),
+                  fingerprint=make_fingerprint(db, password)):
+        raise ValueError(u"Cannot add credential with empty login {}".format(fullname))
+
+
+def batch_update(db, operation):
+    fullname = operation['fullname']
+    credential = db.credential(fullname)
+    if not credential:
+        raise ValueError(u"Credential '{}' not found".format(fullname))
+    password = operation.get('password')
+    if operation.get('random') or operation.get('pattern'):
+        password = genpass(pattern=operation.get('pattern') or db.config['genpass_pattern'])
+
+    values = credential.copy()
+    for field in ('name', 'login', 'comment'):
+        values[field] = operation.get(field) or credential[field]
+    if password:
+        values['password'] = encrypt(password,
+                                     recipient=db.config['recipient'],
+                                     homedir=db.config['homedir'])
+        values['fingerprint'] = make_fingerprint(db, password)
+    db.update(fullname=fullname, values=values)
+
+
+def batch_remove(db, operation):
+    credentials = db.credentials(fullname=operation['fullname'])
+    if not credentials:
+        raise ValueError(u"Credential '{}' not found".format(operation['fullname']))
+    for credential in credentials:
+        db.remove(credential['fullname'])
+
+
+def batch_get(db, operation, passphrase):
+    credential = db.credential(operation['fullname'])
+    if not credential:
+        raise ValueError(u"Credential '{}' not found".format(operation['fullname']))
+    return decrypt(credential['password'],
+                   recipient=db.config['recipient'],
+                   passphrase=passphrase,
+                   homedir=db.config['homedir'])
+
+
+def batch_passphrase(db, filepath, passphrase):
+    if passphrase is None:
+        # stdin holds operations, there is no input left to prompt
+        if filepath.name == '<stdin>':
+            raise click.UsageError('Option --passphrase is required for get operations from stdin')
+        passphrase = click.prompt('Passphrase', hide_input=True)
+        ensure_passphrase(passphrase, db.config)
+    return passphrase
+
+
+BATCH_OPERATIONS = {
+    'add': batch_add,
+    'update': batch_update,
+    'remove': batch_remove,
+}
+
+
+@cli.command(help='Run JSON lines operations from file or stdin in one commit')
+@click.argument("filepath", type=click.File("r"), default="-")
+@click.option("--passphrase", help="Database passphrase for get operations")
+@logging_exception()
+@pass_db
+def batch(db, filepath, passphrase):
+    import json
+
+    if passphrase is not None:
+        ensure_passphrase(passphrase, db.config)
+    changes = 0
+    with db.buffered():
+        for index, line in enumerate(filepath):
+            if not line.strip():
+                continue
+            result = {'index': index}
+            try:
+                operation = json.loads(line)
+                result.update(op=operation.get('op'), fullname=operation.get('fullname'))
+                if operation.get('op') in ('get', 'copy'):
+                    passphrase = batch_passphrase(db, filepath, passphrase)
+                    result['password'] = batch_get(db, operation, passphrase)
+                elif operation.get('op') in BATCH_OPERATIONS:
+                    BATCH_OPERATIONS[operation['op']](db, operation)
+                    changes += 1
+                else:
+                    raise ValueError(u"Unknown operation: {}".format(operation.get('op')))
+                result['ok'] = True
+            except click.ClickException as e:
+                passphrase = None
+                result.update(ok=False, error=click.unstyle(e.format_message()))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                result.update(ok=False, error=str(e))
+            click.echo(json.dumps(result))
+
+    if changes:
+        db.commit(u'Batch of {} operations'.format(changes))
+
+
+@cli.command(help='Shows changes history of a credential')
+@click.argument("fullname")
+@logging_exception()
+@pass_db
+def history(db, fullname):
+    login, _ = split_fullname(fullname)
+    path = db.relpath(fullname)
+    for sha, date, message in db.repo.history(path, follow=login is not None):
+        sha = click.style(sha, fg='magenta')
+        click.echo(u"[{}] {} {}".format(sha, date, message.strip()))
 
 
 @cli.command(help='Shows passpie database changes history')
 @click.option("--init", is_flag=True, help="Enable history tracking")
 @click.option("--reset-to", default=-1, help="Undo changes in database")
+@click.option("--limit", type=click.IntRange(min=0), default=None,
+              help="Show only the last N changes")
+@click.option("--offset", type=click.IntRange(min=0), default=0, help="Skip the last N changes")
+@click.option("--maintenance", is_flag=True, help="Pack history and show a report")
 @logging_exception()
 @pass_db
-def log(db, reset_to, init):
+def log(db, reset_to, init, limit, offset, maintenance):
     if reset_to >= 0:
         logging.info('reset database to index %s', reset_to)
         db.repo.reset(reset_to)
     elif init:
         db.repo.init()
         db.repo.commit(message='Initialized git repository', add=True)
+    elif maintenance:
+        before = db.repo.count_objects()
+        db.repo.gc()
+        after = db.repo.count_objects()
+        labels = [
+            ('count', 'Loose objects'),
+            ('size', 'Loose size (KiB)'),
+            ('in-pack', 'Packed objects'),
+            ('packs', 'Packs'),
+            ('size-pack', 'Packs size (KiB)'),
+            ('prune-packable', 'Prunable objects'),
+        ]
+        for key, label in labels:
+            click.echo(u"{:<20}{:>10} -> {}".format(
+                label, before.get(key, 0), after.get(key, 0)))
     else:
-        commits = []
-        for number, message in enumerate(db.repo.commit_list()):
-            number = click.style(str(number), fg='magenta')
-            message = message.strip()
-            commits.append(u"[{}] {}".format(number, message))
-
-        for commit in reversed(commits):
-            print(commit)
+        for index, sha, date, message in db.repo.log(limit=limit, offset=offset):
+            number = click.style(str(index), fg='magenta')
+            click.echo(u"[{}] {} {} {}".format(number, sha, date, message.strip()))
@@ -1,7 +1,6 @@
 """
 parts of this code from pyperclip: https://github.com/asweigart/pyperclip
 """
-import ctypes
 import logging
 import platform
 import time
@@ -41,6 +40,7 @@ def clean(command, delay):
 
 
 def _copy_windows(text, clear=0):
+    import ctypes
     GMEM_DDESHARE = 0x2000
     CF_UNICODETEXT = 13
     d = ctypes.windll  # cdll expects 4 more bytes in user32.OpenClipboard(0)
@@ -59,6 +59,7 @@ def _copy_windows(text, clear=0):
 
 
 def _copy_cygwin(text, clear=0):
+    import ctypes
     GMEM_DDESHARE = 0x2000
     CF_UNICODETEXT = 13
     d = ctypes.cdll
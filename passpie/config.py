@@ -23,7 +23,9 @@ DEFAULT = {
     'repo': True,
     'autopull': None,
     'autopush': None,
+    'autogc': 1000,
     'status_repeated_passwords_limit': 5,
+    'status_min_score': 2,
     'copy_timeout': 0,
     'extension': '.pass',
     'recipient': None,
@@ -32,6 +34,32 @@ DEFAULT = {
 }
 
 
+class Configuration(dict):
+    """Configuration mapping that only sets up crypt, importing database
+    keys and looking up the default recipient with gpg, the first time
+    `homedir` or `recipient` is accessed. Options as read before the crypt
+    setup are kept in `options`
+    """
+    crypt_keys = ('homedir', 'recipient')
+
+    def __init__(self, *args, **kwargs):
+        super(Configuration, self).__init__(*args, **kwargs)
+        self.crypt_ready = False
+        self.options = dict(self)
+
+    def __getitem__(self, key):
+        if key in self.crypt_keys and not self.crypt_ready:
+            self.crypt_ready = True
+            self.update(setup_crypt(dict(self)))
+        return super(Configuration, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 def is_repo_url(path):
     if path:
         return re.match(
@@ -1,26 +1,31 @@
+from functools import lru_cache
 import re
 
 
-def split_fullname(fullname):
-    regex = re.compile(r'(?:(?P<login>.+?(?:\@.+?)?)@(?P<name>.+?$))')
-    regex_name_only = re.compile(r'(?P<at>@)?(?P<name>.+?$)')
+FULLNAME_REGEX = re.compile(r'(?:(?P<login>.+?(?:\@.+?)?)@(?P<name>.+?$))')
+NAME_REGEX = re.compile(r'(?P<at>@)?(?P<name>.+?$)')
 
-    if regex.match(fullname):
-        mobj = regex.match(fullname)
-    elif regex_name_only.match(fullname):
-        mobj = regex_name_only.match(fullname)
-    else:
+
+@lru_cache(maxsize=4096)
+def split_fullname(fullname):
+    mobj = FULLNAME_REGEX.match(fullname) or NAME_REGEX.match(fullname)
+    if not mobj:
         raise ValueError("Not a valid name")
 
-    if mobj.groupdict().get('at'):
+    groups = mobj.groupdict()
+    if groups.get('at'):
         login = ""
     else:
-        login = mobj.groupdict().get('login')
-    name = mobj.groupdict().get("name")
+        login = groups.get('login')
+    name = groups.get("name")
 
     return login, name
 
 
+def split_fullnames(fullnames):
+    return [split_fullname(fullname) for fullname in fullnames]
+
+
 def make_fullname(login, name):
     fullname = u"{}@{}".format("" if login is None else login, name)
     return fullname
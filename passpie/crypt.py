@@ -191,3 +191,28 @@ def decrypt(data, recipient, passphrase, homedir):
         ]
         output, error = process.call(command, input=data)
     return output
+
+
+def call_many(func, items, recipient, homedir, workers=None, **kwargs):
+    """Call `encrypt` or `decrypt` on data items concurrently, each in its
+    own gpg process. Default recipient is looked up once. Results keep
+    items order
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not items:
+        return []
+    recipient = recipient if recipient else get_default_recipient(homedir)
+    workers = workers if workers else min(len(items), (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda data: func(data, recipient=recipient, homedir=homedir, **kwargs),
+            items))
+
+
+def decrypt_many(items, recipient, passphrase, homedir, workers=None):
+    return call_many(decrypt, items, recipient, homedir, workers, passphrase=passphrase)
+
+
+def encrypt_many(items, recipient, homedir, workers=None):
+    return call_many(encrypt, items, recipient, homedir, workers)
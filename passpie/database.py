@@ -1,14 +1,21 @@
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 import logging
 import os
+import re
 import shutil
 
 from tinydb import TinyDB, Storage, where, Query
+from tinydb.table import Document
 import yaml
 
-from .utils import mkdir_open
+from .utils import mkdir_open, lock
 from .history import Repository
-from .credential import split_fullname, make_fullname
+from .query import Index, parse
+from .credential import split_fullname, split_fullnames, make_fullname
+
+YAML_LOADER = getattr(yaml, 'CFullLoader', yaml.FullLoader)
 
 
 class PasspieStorage(Storage):
@@ -17,40 +24,119 @@ class PasspieStorage(Storage):
     def __init__(self, path):
         super(PasspieStorage, self).__init__()
         self.path = path
+        self.snapshot = None
+        self.buffer = None
+        self.version = 0
+        self.holds_lock = False
+        self.written = set()
 
     def make_credpath(self, name, login):
         dirname, filename = name, login + self.extension
         credpath = os.path.join(self.path, dirname, filename)
         return credpath
 
+    def keyed(self, credentials):
+        return {(c.get("name"), c.get("login")): dict(c) for c in credentials}
+
     def delete(self, credentials):
         for cred in credentials:
             credpath = self.make_credpath(cred["name"], cred["login"])
-            os.remove(credpath)
-            if not os.listdir(os.path.dirname(credpath)):
-                shutil.rmtree(os.path.dirname(credpath))
+            if os.path.exists(credpath):
+                os.remove(credpath)
+            dirname = os.path.dirname(credpath)
+            if os.path.isdir(dirname) and not os.listdir(dirname):
+                shutil.rmtree(dirname)
 
-    def read(self):
-        elements = []
+    @contextmanager
+    def locked(self):
+        """Hold the database lock. Nested blocks reuse the lock already held"""
+        if self.holds_lock:
+            yield
+            return
+        with lock(self.path):
+            self.holds_lock = True
+            try:
+                yield
+            finally:
+                self.holds_lock = False
+
+    @contextmanager
+    def buffered(self):
+        """Keep reads and writes in memory and flush changes to disk once
+        when leaving the block. Changes are discarded on errors
+        """
+        self.buffer = self.read()
+        try:
+            yield
+            data = self.buffer
+        finally:
+            self.buffer = None
+        self.write(data)
+
+    def iter_credentials(self):
+        """Yield credentials one at a time sorted by name and login"""
+        if self.buffer is not None:
+            for elem in self.buffer["_default"].values():
+                yield elem
+            return
         for rootdir, dirs, files in os.walk(self.path):
-            filenames = [f for f in files if f.endswith(self.extension)]
-            for filename in filenames:
-                docpath = os.path.join(rootdir, filename)
-                with open(docpath) as f:
-                    elements.append(yaml.full_load(f.read()))
+            dirs[:] = sorted(d for d in dirs if d != '.git')
+            for filename in sorted(f for f in files if f.endswith(self.extension)):
+                with open(os.path.join(rootdir, filename)) as f:
+                    yield yaml.load(f.read(), Loader=YAML_LOADER)
 
+    def read(self):
+        if self.buffer is not None:
+            return self.buffer
+        with self.locked():
+            elements = list(self.iter_credentials())
+        self.snapshot = self.keyed(elements)
         return {"_default":
                 {idx: elem for idx, elem in enumerate(elements, start=1)}}
 
     def write(self, data):
-        deleted = [c for c in self.read()["_default"].values()
-                   if c not in data["_default"].values()]
-        self.delete(deleted)
+        """Write only credentials changed since last read. Files changed by
+        concurrent processes in the meantime are left untouched
+        """
+        self.version += 1
+        if self.buffer is not None:
+            self.buffer = data
+            return
+        if self.snapshot is None:
+            self.snapshot = self.keyed(self.read()["_default"].values())
+        credentials = self.keyed(data["_default"].values())
+        deleted = [c for key, c in self.snapshot.items() if key not in credentials]
+        changed = [c for key, c in credentials.items() if self.snapshot.get(key) != c]
+
+        with self.locked():
+            self.delete(deleted)
+            for cred in changed:
+                credpath = self.make_credpath(cred["name"], cred["login"])
+                with mkdir_open(credpath, "w") as f:
+                    f.write(yaml.safe_dump(dict(cred), default_flow_style=False))
+        self.written.update(self.make_credpath(c["name"], c["login"]) for c in deleted + changed)
+        self.snapshot = credentials
 
-        for eid, cred in data["_default"].items():
-            credpath = self.make_credpath(cred["name"], cred["login"])
-            with mkdir_open(credpath, "w") as f:
-                f.write(yaml.safe_dump(dict(cred), default_flow_style=False))
+
+class RevisionStorage(PasspieStorage):
+    """Read only storage loading credentials from git objects of revision"""
+
+    def __init__(self, path, revision):
+        super(RevisionStorage, self).__init__(path)
+        self.revision = revision
+
+    def iter_credentials(self):
+        return iter(self.read()["_default"].values())
+
+    def read(self):
+        repo = Repository(self.path)
+        elements = [yaml.load(content, Loader=YAML_LOADER)
+                    for content in repo.read_tree(self.revision, self.extension)]
+        return {"_default":
+                {idx: elem for idx, elem in enumerate(elements, start=1)}}
+
+    def write(self, data):
+        raise IOError('Database is read only at revision {}'.format(self.revision))
 
 
 class Database(TinyDB):
@@ -60,10 +146,53 @@ class Database(TinyDB):
         self.path = config['path']
         self.repo = Repository(self.path,
                                autopull=config.get('autopull'),
-                               autopush=config.get('autopush'))
+                               autopush=config.get('autopush'),
+                               autogc=config.get('autogc'))
+        self.sparse = config.get('sparse')
+        self.fetched = set()
+        self.query_index = None
+        self.query_index_version = None
+        self.disk_state = None
+        self.fingerprint_keys = {}
         PasspieStorage.extension = config['extension']
+        if config.get('revision'):
+            storage = partial(RevisionStorage, revision=config['revision'])
         super(Database, self).__init__(self.path, storage=storage)
 
+    def fetch(self, name=None):
+        """Checkout credentials from a partial clone on demand. Credentials
+        are stored as `<name>/<login>.pass` so a fullname is enough to
+        find which directory to checkout. Without name everything is fetched
+        """
+        if not self.sparse:
+            return
+        if name is None:
+            self.repo.sparse_checkout()
+            self.sparse = False
+            self.query_index = None
+        elif name not in self.fetched:
+            self.repo.sparse_checkout([name])
+            self.fetched.add(name)
+            self.query_index = None
+
+    def relpath(self, fullname):
+        """Credential path relative to database, directory for name only fullnames"""
+        login, name = split_fullname(fullname)
+        if login is None:
+            return name
+        return os.path.relpath(self.filename(fullname), self.path)
+
+    def buffered(self):
+        return self._storage.buffered()
+
+    def commit(self, message):
+        """Commit only files written by this database since its last commit,
+        files written by concurrent processes go in their own commits
+        """
+        paths = sorted(self._storage.written)
+        self._storage.written.clear()
+        self.repo.commit(message=message, paths=paths)
+
     def has_keys(self):
         return os.path.exists(os.path.join(self.path, '.keys'))
 
@@ -73,6 +202,7 @@ class Database(TinyDB):
 
     def credential(self, fullname):
         login, name = split_fullname(fullname)
+        self.fetch(name)
         credential = Query()
         if login is None:
             creds = self.get(credential.name == name)
@@ -80,24 +210,49 @@ class Database(TinyDB):
             creds = self.get((credential.login == login) & (credential.name == name))
         return creds
 
-    def add(self, fullname, password, comment):
+    def credentials_many(self, fullnames):
+        """Return credentials of fullnames in order, None for fullnames not
+        found, reading the database once unless it is a sparse checkout
+        """
+        if self.sparse:
+            # the index reads every credential, checkout only requested names
+            return [self.credential(fullname) for fullname in fullnames]
+        keys = split_fullnames(fullnames)
+        index = self.index()
+        credentials = []
+        for login, name in keys:
+            ids = index.hashes['name'].get(name, set())
+            if login is not None:
+                ids = ids & index.hashes['login'].get(login, set())
+            credentials.append(index.documents[min(ids)] if ids else None)
+        return credentials
+
+    def add(self, fullname, password, comment, fingerprint=None):
         login, name = split_fullname(fullname)
         if login is None:
             logging.error('Cannot add credential with empty login. use "@<name>" syntax')
             return None
+        self.fetch(name)
         credential = dict(fullname=fullname,
                           name=name,
                           login=login,
                           password=password,
                           comment=comment,
                           modified=datetime.now())
-        self.insert(credential)
+        if fingerprint:
+            credential['fingerprint'] = fingerprint
+        # ids are storage positions, so pick one while other processes wait
+        with self._storage.locked():
+            doc_id = max((int(i) for i in self._storage.read()['_default']), default=0) + 1
+            self.insert(Document(credential, doc_id=doc_id))
         return credential
 
     def update(self, fullname, values):
         login, name = split_fullname(fullname)
         values['fullname'] = make_fullname(values["login"], values["name"])
         values['modified'] = datetime.now()
+        self.fetch(name)
+        self.fetch(values['name'])
         credential = Query()
         if login is None:
             query = (credential.name == name)
@@ -108,6 +263,7 @@ class Database(TinyDB):
     def credentials(self, fullname=None):
         if fullname:
             login, name = split_fullname(fullname)
+            self.fetch(name)
             credential = Query()
             if login is None:
                 creds = self.search(credential.name == name)
@@ -117,10 +273,64 @@ class Database(TinyDB):
             creds = self.all()
         return sorted(creds, key=lambda x: x["name"] + x["login"])
 
+    def all(self):
+        self.fetch()
+        return self.table(self.default_table_name).all()
+
     def remove(self, fullname):
         self.table(self.default_table_name).remove(where('fullname') == fullname)
 
+    def iter_credentials(self, regex=None):
+        """Yield credentials straight from storage, without loading the
+        whole database. Filter by regex as `matches` does
+        """
+        self.fetch()
+        pattern = re.compile(regex) if regex else None
+        for credential in self._storage.iter_credentials():
+            if pattern is None or any(pattern.match(credential.get(field) or '')
+                                      for field in ('name', 'login', 'comment')):
+                yield credential
+
+    def index(self):
+        """Return indexes of all credentials, rebuilt after writes"""
+        if self.query_index is None or self.query_index_version != self.storage.version:
+            self.query_index = Index(self.all())
+            self.query_index_version = self.storage.version
+        return self.query_index
+
+    def clear_cache(self):
+        self.query_index = None
+        self.table(self.default_table_name).clear_cache()
+
+    def refresh(self):
+        """Clear caches when files changed on disk since the last refresh.
+        Git tracked databases are checked from the git index and HEAD log,
+        which passpie updates on every change, others from every file
+        """
+        gitdir = os.path.join(self.path, '.git')
+        if os.path.isdir(gitdir):
+            paths = [self.path, os.path.join(gitdir, 'index'), os.path.join(gitdir, 'logs', 'HEAD')]
+        else:
+            paths = [os.path.join(root, name) for root, dirs, files in os.walk(self.path)
+                     for name in dirs + files]
+        state = []
+        for path in paths:
+            try:
+                info = os.stat(path)
+                state.append((path, info.st_mtime_ns, info.st_size))
+            except OSError:
+                state.append((path, None, None))
+        if state != self.disk_state:
+            self.clear_cache()
+            self.disk_state = state
+
+    def find(self, text):
+        """Search credentials with a query as parsed by `query.parse`"""
+        credentials = self.index().execute(parse(text))
+        return sorted((dict(c) for c in credentials), key=lambda x: x["name"] + x["login"])
+
     def matches(self, regex):
+        self.fetch()
         credential = Query()
         credentials = self.search(
             credential.name.matches(regex) |
@@ -0,0 +1,31 @@
+import base64
+import hashlib
+import hmac
+import os
+
+
+KEY_FILENAME = '.fingerprint'
+
+
+def generate_key():
+    return base64.b64encode(os.urandom(32)).decode('ascii')
+
+
+def key_id(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:8]
+
+
+def make(key, password):
+    """Keyed fingerprint of password prefixed with the id of its key.
+    Without the key fingerprints cannot be tested against guesses
+    """
+    digest = hmac.new(key.encode('utf-8'), password.encode('utf-8'), hashlib.sha256)
+    return u'{}${}'.format(key_id(key), digest.hexdigest())
+
+
+def is_valid(fingerprint, key):
+    return bool(fingerprint) and fingerprint.startswith(key_id(key) + '$')
+
+
+def digest(encrypted):
+    return hashlib.sha256(encrypted.encode('utf-8')).hexdigest()
@@ -0,0 +1,151 @@
+import heapq
+import re
+
+import click
+
+
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CONSECUTIVE = 4
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+SEPARATORS = ' @./-_:'
+
+KEYS_ACCEPT = ('\r', '\n')
+KEYS_CANCEL = ('\x1b', '\x07')
+KEYS_DELETE = ('\x7f', '\x08')
+KEYS_UP = ('\x1b[A', '\x10')
+KEYS_DOWN = ('\x1b[B', '\x0e')
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+
+
+def window(query, lowered):
+    """Return start and end of the shortest window ending the first match
+    of query characters in order, None without match
+    """
+    index = 0
+    for end, char in enumerate(lowered):
+        if char == query[index]:
+            index += 1
+            if index == len(query):
+                break
+    else:
+        return None
+    index = len(query) - 1
+    for start in range(end, -1, -1):
+        if lowered[start] == query[index]:
+            index -= 1
+            if index < 0:
+                return start, end
+
+
+def score(query, text):
+    """Score text for query fzf style. Query characters must appear in
+    order, matches on word boundaries and consecutive matches score
+    higher, gaps between matches are penalized. Returns None without match
+    """
+    if not query:
+        return 0
+    query, lowered = query.lower(), text.lower()
+    match = window(query, lowered)
+    if match is None:
+        return None
+    start, end = match
+
+    total, previous, index = 0, None, 0
+    for position in range(start, end + 1):
+        if index < len(query) and lowered[position] == query[index]:
+            total += SCORE_MATCH
+            before = text[position - 1] if position else ''
+            if not before or before in SEPARATORS or (before.islower() and text[position].isupper()):
+                total += BONUS_BOUNDARY
+            if previous == position - 1:
+                total += BONUS_CONSECUTIVE
+            previous = position
+            index += 1
+        elif previous == position - 1:
+            total -= PENALTY_GAP_START
+        else:
+            total -= PENALTY_GAP_EXTENSION
+    return total
+
+
+class Finder(object):
+    """Rank items by fuzzy matching their text. Matches of a query are kept
+    so typing more characters only filters the previous matches
+    """
+
+    def __init__(self, items, key):
+        self.items = list(items)
+        self.texts = [key(item) for item in self.items]
+        self.lowered = [text.lower() for text in self.texts]
+        self.matches = {'': list(range(len(self.items)))}
+
+    def matching(self, query):
+        query = query.lower()
+        prefixes = [q for q in self.matches if query.startswith(q)]
+        self.matches = {q: self.matches[q] for q in prefixes}
+        if query not in self.matches:
+            pattern = re.compile('.*?'.join(re.escape(c) for c in query))
+            candidates = self.matches[max(prefixes, key=len)]
+            self.matches[query] = [i for i in candidates if pattern.search(self.lowered[i])]
+        return self.matches[query]
+
+    def rank(self, query, limit=None):
+        """Return indices of items matching query, best matches first"""
+        ranked = ((score(query, self.texts[i]), -len(self.texts[i]), -i)
+                  for i in self.matching(query))
+        if limit:
+            ranked = heapq.nlargest(limit, ranked)
+        else:
+            ranked = sorted(ranked, reverse=True)
+        return [-i for _, _, i in ranked]
+
+    def search(self, query, limit=None):
+        return [self.items[i] for i in self.rank(query, limit)]
+
+    def __len__(self):
+        return len(self.items)
+
+
+def draw(finder, query, results, selected):
+    lines = [u'> {}'.format(query),
+             click.style(u'  {}/{}'.format(len(finder.matching(query)), len(finder)), fg='yellow')]
+    for index, item_index in enumerate(results):
+        text = finder.texts[item_index]
+        if index == selected:
+            lines.append(click.style(u'> {}'.format(text), bold=True))
+        else:
+            lines.append(u'  {}'.format(text))
+    click.echo(CLEAR_SCREEN + u'\n'.join(lines), err=True, nl=False)
+
+
+def pick(finder, query='', height=10, getchar=click.getchar):
+    """Run the interactive finder on the terminal and return the selected
+    item, or None when cancelled
+    """
+    selected = 0
+    try:
+        while True:
+            results = finder.rank(query, limit=height)
+            selected = max(min(selected, len(results) - 1), 0)
+            draw(finder, query, results, selected)
+
+            key = getchar()
+            if key in KEYS_ACCEPT:
+                return finder.items[results[selected]] if results else None
+            elif not key or key in KEYS_CANCEL:
+                return None
+            elif key in KEYS_DELETE:
+                query = query[:-1]
+            elif key in KEYS_UP:
+                selected -= 1
+            elif key in KEYS_DOWN:
+                selected += 1
+            elif key.isprintable():
+                query += key
+                selected = 0
+    except (KeyboardInterrupt, EOFError):
+        return None
+    finally:
+        click.echo(CLEAR_SCREEN, err=True, nl=False)
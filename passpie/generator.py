@@ -0,0 +1,206 @@
+from functools import lru_cache
+import math
+import os
+import re
+import string
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+
+REPEAT_LIMIT = 100
+BUFFER_SIZE = 4096
+ALPHABETS = {
+    'CATEGORY_DIGIT': string.digits,
+    'CATEGORY_NOT_DIGIT': string.ascii_letters + string.punctuation,
+    'CATEGORY_SPACE': string.whitespace,
+    'CATEGORY_NOT_SPACE': string.printable.strip(),
+    'CATEGORY_WORD': string.ascii_letters + string.digits + '_',
+    'CATEGORY_NOT_WORD': ''.join(c for c in string.printable
+                                 if c not in string.ascii_letters + string.digits + '_'),
+}
+
+
+class UnsupportedPattern(ValueError):
+    pass
+
+
+class RandomBytes(object):
+    """Uniform random integers from os.urandom bytes read in batches. The
+    buffer is dropped in forked processes so they never share bytes
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.size = size
+        self.buffer = b''
+        self.position = 0
+        self.pid = None
+
+    def read(self, count):
+        if self.pid != os.getpid() or self.position + count > len(self.buffer):
+            self.buffer = os.urandom(max(self.size, count))
+            self.position = 0
+            self.pid = os.getpid()
+        data = self.buffer[self.position:self.position + count]
+        self.position += count
+        return data
+
+    def below(self, n):
+        """Return an integer in [0, n) without modulo bias"""
+        if n <= 1:
+            return 0
+        size = ((n - 1).bit_length() + 7) // 8
+        limit = (256 ** size // n) * n
+        while True:
+            value = int.from_bytes(self.read(size), 'big')
+            if value < limit:
+                return value % n
+
+    def choices(self, alphabet, count):
+        """Return count characters of alphabet, one byte each for
+        alphabets up to 256 characters
+        """
+        size = len(alphabet)
+        if size > 256:
+            return [alphabet[self.below(size)] for _ in range(count)]
+        limit = 256 // size * size
+        chosen = []
+        while len(chosen) < count:
+            chosen.extend(alphabet[b % size] for b in self.read(count - len(chosen)) if b < limit)
+        return chosen
+
+
+class Chars(object):
+    def __init__(self, alphabet):
+        self.alphabet = alphabet
+        self.entropy = math.log(len(alphabet), 2)
+
+    def generate(self, random):
+        return self.alphabet[random.below(len(self.alphabet))]
+
+
+class Literal(object):
+    entropy = 0.0
+
+    def __init__(self, text):
+        self.text = text
+
+    def generate(self, random):
+        return self.text
+
+
+class Sequence(object):
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.entropy = sum(node.entropy for node in nodes)
+
+    def generate(self, random):
+        return u''.join(node.generate(random) for node in self.nodes)
+
+
+class Repeat(object):
+    def __init__(self, minimum, maximum, node):
+        self.minimum, self.maximum, self.node = minimum, maximum, node
+        counts = maximum - minimum + 1
+        self.entropy = math.log(counts, 2) + (minimum + maximum) / 2.0 * node.entropy
+
+    def generate(self, random):
+        count = self.minimum + random.below(self.maximum - self.minimum + 1)
+        if isinstance(self.node, Chars):
+            return u''.join(random.choices(self.node.alphabet, count))
+        return u''.join(self.node.generate(random) for _ in range(count))
+
+
+class Branch(object):
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.entropy = math.log(len(nodes), 2) + sum(n.entropy for n in nodes) / len(nodes)
+
+    def generate(self, random):
+        return self.nodes[random.below(len(self.nodes))].generate(random)
+
+
+def opname(opcode):
+    return getattr(opcode, 'name', str(opcode)).upper()
+
+
+def set_alphabet(items):
+    chars, negate = [], False
+    for opcode, value in items:
+        name = opname(opcode)
+        if name == 'NEGATE':
+            negate = True
+        elif name == 'LITERAL':
+            chars.append(chr(value))
+        elif name == 'RANGE':
+            chars.extend(chr(c) for c in range(value[0], value[1] + 1))
+        elif name == 'CATEGORY':
+            chars.extend(ALPHABETS[opname(value)])
+        else:
+            raise UnsupportedPattern(u'Unsupported character set item: {}'.format(name))
+    if negate:
+        chars = [c for c in string.printable if c not in chars]
+    if not chars:
+        raise UnsupportedPattern(u'Empty character set')
+    return u''.join(sorted(set(chars)))
+
+
+def plan(parsed):
+    """Build a sampling plan of nodes from sre_parse output"""
+    nodes = []
+    for opcode, value in parsed:
+        name = opname(opcode)
+        if name == 'LITERAL':
+            if nodes and isinstance(nodes[-1], Literal):
+                nodes[-1] = Literal(nodes[-1].text + chr(value))
+            else:
+                nodes.append(Literal(chr(value)))
+        elif name == 'NOT_LITERAL':
+            nodes.append(Chars(string.printable.replace(chr(value), '')))
+        elif name == 'ANY':
+            nodes.append(Chars(string.printable.replace('\n', '')))
+        elif name == 'IN':
+            nodes.append(Chars(set_alphabet(value)))
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            minimum, maximum, subpattern = value
+            maximum = min(maximum, max(minimum, REPEAT_LIMIT))
+            nodes.append(Repeat(minimum, maximum, plan(subpattern)))
+        elif name == 'SUBPATTERN':
+            nodes.append(plan(value[-1]))
+        elif name == 'BRANCH':
+            nodes.append(Branch([plan(subpattern) for subpattern in value[1]]))
+        elif name == 'AT':
+            continue
+        else:
+            raise UnsupportedPattern(u'Unsupported pattern element: {}'.format(name))
+    return nodes[0] if len(nodes) == 1 else Sequence(nodes)
+
+
+class Generator(object):
+    """Password generator for a regular expression pattern, parsed once"""
+
+    def __init__(self, pattern, random=None):
+        self.pattern = pattern
+        self.random = random if random else RandomBytes()
+        try:
+            self.plan = plan(sre_parse.parse(pattern))
+        except re.error as e:
+            raise ValueError(str(e))
+
+    @property
+    def entropy(self):
+        """Bits of entropy of generated passwords"""
+        return self.plan.entropy
+
+    def generate(self):
+        return self.plan.generate(self.random)
+
+    def generate_many(self, count):
+        return [self.plan.generate(self.random) for _ in range(count)]
+
+
+@lru_cache(maxsize=64)
+def compile(pattern):
+    return Generator(pattern)
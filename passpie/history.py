@@ -3,10 +3,14 @@ import logging
 import os
 
 from . import process
-from .utils import which, tempdir
+from .utils import which, tempdir, lock, mkdir_open
 from ._compat import FileExistsError
 
 
+LOG_DATE_OPTION = '--date=format:%Y-%m-%d %H:%M'
+LOG_FORMAT_OPTION = '--pretty=format:%h%x1f%ad%x1f%s'
+
+
 def ensure_git(return_value=None):
     def decorator(func):
         @wraps(func)
@@ -21,23 +25,28 @@ def ensure_git(return_value=None):
 
 
 @ensure_git()
-def clone(url, dest=None, depth=None):
+def clone(url, dest=None, depth=None, partial=False):
     if dest and os.path.exists(dest):
         raise FileExistsError('Destination already exists: %s' % dest)
     dest = dest if dest else tempdir()
     cmd = ['git', 'clone', url, dest]
     if depth:
         cmd += ['--depth', depth]
+    if partial:
+        # blobless sparse clone: only trees and top level files are fetched,
+        # credential blobs are downloaded when their directory is checked out
+        cmd += ['--filter=blob:none', '--sparse']
     process.call(cmd)
     return dest
 
 
 class Repository(object):
 
-    def __init__(self, path, autopull=None, autopush=None):
+    def __init__(self, path, autopull=None, autopush=None, autogc=None):
         self.path = path
         self.autopush = autopush
         self.autopull = autopull
+        self.autogc = autogc
         self.author = "Passpie <passpie@localhost>"
         if autopull:
             self.pull_rebase(*autopull)
@@ -47,6 +56,20 @@ class Repository(object):
         cmd = ['git', 'init', self.path]
         process.call(cmd)
 
+    def exclude(self, pattern):
+        """Add pattern to the repository exclude file, untracked files
+        matching it are never committed
+        """
+        if not os.path.isdir(os.path.join(self.path, '.git')):
+            return
+        filename = os.path.join(self.path, '.git', 'info', 'exclude')
+        if os.path.exists(filename):
+            with open(filename) as f:
+                if pattern in f.read().splitlines():
+                    return
+        with mkdir_open(filename, 'a') as f:
+            f.write(pattern + '\n')
+
     @ensure_git()
     def pull_rebase(self, remote='origin', branch='master'):
         cmd = ['git', 'pull', '--rebase', remote, branch]
@@ -65,33 +88,144 @@ class Repository(object):
             cmd = ['git', 'add', '.']
         process.call(cmd, cwd=self.path)
 
+    def tracked(self, paths):
+        cmd = ['git', 'ls-files', '-z', '--'] + list(paths)
+        output, _ = process.call(cmd, cwd=self.path)
+        return set(output.split('\0'))
+
     @ensure_git()
-    def commit(self, message, add=True):
+    def commit(self, message, add=True, paths=None):
+        """Commit changes. With paths, only those files are staged and
+        committed so changes of concurrent writers stay out of the commit
+        """
         author_option = "--author={}".format(self.author)
-        if add:
-            self.add(all=True)
-        cmd = ['git', 'commit', author_option, '-m', message]
-        process.call(cmd, cwd=self.path)
+        with lock(self.path):
+            cmd = ['git', 'commit', author_option, '-m', message]
+            if paths is not None:
+                paths = [os.path.relpath(p, self.path) for p in paths]
+                missing = [p for p in paths if not os.path.exists(os.path.join(self.path, p))]
+                tracked = self.tracked(missing) if missing else set()
+                paths = [p for p in paths if p not in missing or p in tracked]
+                if not paths:
+                    return
+                process.call(['git', 'add', '--all', '--'] + paths, cwd=self.path)
+                cmd += ['--'] + paths
+            elif add:
+                self.add(all=True)
+            process.call(cmd, cwd=self.path)
+        if self.autogc:
+            self.gc(auto=True)
         if self.autopush:
             self.push()
 
+    @ensure_git(return_value={})
+    def count_objects(self):
+        cmd = ['git', 'count-objects', '-v']
+        output, _ = process.call(cmd, cwd=self.path)
+        stats = {}
+        for line in output.splitlines():
+            key, _, value = line.partition(':')
+            try:
+                stats[key.strip()] = int(value)
+            except ValueError:
+                continue
+        return stats
+
+    @ensure_git()
+    def gc(self, auto=False):
+        """Pack loose objects and prune unreachable ones. With auto, git
+        only packs when loose objects exceed autogc threshold and does it
+        detached in background, so the calling command doesn't wait for it
+        """
+        if auto:
+            cmd = ['git', '-c', 'gc.auto={}'.format(self.autogc),
+                   '-c', 'gc.autoDetach=true', 'gc', '--auto', '--quiet']
+        else:
+            cmd = ['git', 'gc', '--quiet']
+        process.call(cmd, cwd=self.path, stdout=process.DEVNULL)
+
+    @ensure_git()
+    def sparse_checkout(self, dirnames=None):
+        if dirnames is None:
+            cmd = ['git', 'sparse-checkout', 'disable']
+        else:
+            cmd = ['git', 'sparse-checkout', 'add'] + list(dirnames)
+        process.call(cmd, cwd=self.path)
+
+    @ensure_git(return_value=0)
+    def count(self):
+        cmd = ['git', 'rev-list', '--count', '--first-parent', 'HEAD']
+        output, _ = process.call(cmd, cwd=self.path)
+        try:
+            return int(output.strip())
+        except ValueError:
+            return 0
+
+    @ensure_git(return_value=[])
+    def log(self, limit=None, offset=0):
+        """Yield (index, sha, date, message) from the newest commit to
+        the oldest. Index 0 is the first commit of the repository. Git
+        only lists the requested page, numbered from the commit count
+        """
+        total = self.count()
+        cmd = ['git', 'log', '--first-parent', '--skip={}'.format(offset)]
+        if limit is not None:
+            cmd.append('--max-count={}'.format(limit))
+        cmd += [LOG_DATE_OPTION, LOG_FORMAT_OPTION]
+        output, _ = process.call(cmd, cwd=self.path)
+        for position, line in enumerate(output.splitlines(), start=offset):
+            sha, date, message = line.split('\x1f', 2)
+            yield total - position - 1, sha, date, message
+
     @ensure_git(return_value=[])
-    def commit_list(self):
-        cmd = ['git', 'log', '--reverse', '--pretty=format:%s']
+    def history(self, path, follow=False):
+        """Yield (sha, date, message) of commits touching path"""
+        cmd = ['git', 'log', LOG_DATE_OPTION, LOG_FORMAT_OPTION]
+        if follow:
+            cmd.append('--follow')
+        cmd += ['--', path]
         output, _ = process.call(cmd, cwd=self.path)
-        return output.splitlines()
+        for line in output.splitlines():
+            sha, date, message = line.split('\x1f', 2)
+            yield sha, date, message
 
     @ensure_git(return_value=[])
-    def sha_list(self):
-        cmd = ['git', 'log', '--reverse', '--pretty=format:%h']
+    def read_tree(self, revision, extension=''):
+        """Return contents of files ending with extension as of revision.
+        Contents are read from git objects, without touching working tree
+        """
+        cmd = ['git', 'ls-tree', '-r', '-z', revision]
         output, _ = process.call(cmd, cwd=self.path)
-        return output.splitlines()
+        shas = []
+        for entry in output.split('\0'):
+            if not entry:
+                continue
+            info, path = entry.split('\t', 1)
+            _, objtype, sha = info.split()
+            if objtype == 'blob' and path.endswith(extension):
+                shas.append(sha)
+        if not shas:
+            return []
+
+        cmd = ['git', 'cat-file', '--batch']
+        output, _ = process.call(cmd, cwd=self.path, input='\n'.join(shas) + '\n')
+        data = output.encode('utf-8')
+        contents = []
+        position = 0
+        while position < len(data):
+            header_end = data.index(b'\n', position)
+            size = int(data[position:header_end].split()[2])
+            start = header_end + 1
+            contents.append(data[start:start + size].decode('utf-8'))
+            position = start + size + 1
+        return contents
 
     @ensure_git()
     def reset(self, to_index):
-        try:
-            sha = self.sha_list()[to_index]
+        count = self.count()
+        if 0 <= to_index < count:
+            sha = 'HEAD~{}'.format(count - to_index - 1)
             cmd = ['git', 'reset', '--hard', sha]
             process.call(cmd, cwd=self.path)
-        except IndexError:
+        else:
             logging.info('commit on index "{}" not found'.format(to_index))
@@ -1,10 +1,6 @@
-import inspect
-import os
-import glob
+import importlib
 import logging
 
-import pkg_resources
-
 
 class BaseImporter(object):
 
@@ -26,39 +22,68 @@ class BaseImporter(object):
         raise NotImplementedError('Handle should be implemented by base class')
 
 
-__all__ = [os.path.basename(f)[:-3]
-           for f in glob.glob(os.path.dirname(__file__) + "/*.py")]
+BUILTIN_IMPORTERS = {
+    'csv': 'passpie.importers.csv_importer:CSVImporter',
+    'default': 'passpie.importers.default_importer:DefaultImporter',
+    'keepass': 'passpie.importers.keepass_importer:KeepassImporter',
+    'pysswords': 'passpie.importers.pysswords_importer:PysswordsImporter',
+}
+ENTRY_POINTS_GROUP = 'passpie_importers'
+_registry = {}
 
 
-def _import_all_importer_files():
-    __import__(__name__, globals(), locals(), __all__, 0)
+def _iter_entry_points(group=ENTRY_POINTS_GROUP):
+    """Yield (name, 'module:attr') of installed plugins without loading them"""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # pragma: no cover
+        import pkg_resources
+        for ep in pkg_resources.iter_entry_points(group):
+            yield ep.name, '{}:{}'.format(ep.module_name, '.'.join(ep.attrs))
+        return
+
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, [])
+    for ep in eps:
+        yield ep.name, ep.value
+
+
+def registry():
+    """Cached mapping of importer names to their 'module:attr' reference.
+    Builtin importers are known beforehand and plugins are read from entry
+    points metadata, so no importer module is imported to build it
+    """
+    if not _registry:
+        _registry.update(BUILTIN_IMPORTERS)
+        for name, reference in _iter_entry_points():
+            _registry.setdefault(name, reference)
+    return _registry
 
 
-def _get_importers_from_entry_points():
-    for ep in pkg_resources.iter_entry_points('passpie_importers'):
-        try:
-            module = __import__(ep.module_name, globals(), locals(), ep.attrs, 0)
-            klass = getattr(module, ep.attrs[0])
-            if klass is not BaseImporter and issubclass(klass, BaseImporter):
-                yield klass
-        except (ImportError, AttributeError):
-            pass
+def load(reference):
+    """Import importer class from a 'module:attr' reference"""
+    module_name, _, attrs = reference.partition(':')
+    try:
+        klass = importlib.import_module(module_name)
+        for attr in attrs.split('.'):
+            klass = getattr(klass, attr)
+    except (ImportError, AttributeError):
+        logging.debug(u'importer "{}" could not be loaded'.format(reference))
+        return None
+    if isinstance(klass, type) and klass is not BaseImporter and issubclass(klass, BaseImporter):
+        return klass
 
 
 def get_all():
-    """Get all subclasses of BaseImporter from module and return and generator
+    """Get all subclasses of BaseImporter from registry and return and generator
     """
-
-    _import_all_importer_files()
-
-    for module in (value for key, value in globals().items()
-                   if key in __all__):
-        for klass_name, klass in inspect.getmembers(module, inspect.isclass):
-            if klass is not BaseImporter and issubclass(klass, BaseImporter):
-                yield klass
-
-    for klass in _get_importers_from_entry_points():
-        yield klass
+    for reference in registry().values():
+        klass = load(reference)
+        if klass:
+            yield klass
 
 
 def get_instances():
@@ -67,14 +92,14 @@ def get_instances():
 
 
 def get_names():
-    return [i.name for i in get_instances()]
+    return sorted(registry())
 
 
 def get(name):
-    try:
-        return next(i for i in get_instances() if i.name == name)
-    except StopIteration:
-        return None
+    reference = registry().get(name)
+    klass = load(reference) if reference else None
+    if klass:
+        return klass()
 
 
 def find_importer(filepath):
@@ -0,0 +1,169 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+import re
+
+
+FIELDS = ('name', 'login', 'comment', 'fullname', 'modified')
+TEXT_FIELDS = ('name', 'login', 'comment')
+INDEXED_FIELDS = ('name', 'login')
+UNITS = {'h': 'hours', 'd': 'days', 'w': 'weeks'}
+DURATION_REGEX = re.compile(r'^(?P<value>\d+)(?P<unit>[hdw])$')
+COMPARISON_REGEX = re.compile(r'^(?P<op><=|>=|<|>|=)?(?P<value>.+)$')
+TERM_REGEX = re.compile(r'''(?:[^\s"']|"[^"]*"|'[^']*')+''')
+QUOTED_REGEX = re.compile(r'"([^"]*)"|\'([^\']*)\'')
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Predicate(namedtuple('Predicate', 'field op value')):
+    """Single query term. `field` is None for terms matching a regular
+    expression against name, login and comment
+    """
+
+    @property
+    def indexed(self):
+        if self.field in INDEXED_FIELDS:
+            return self.op == '='
+        return self.field == 'modified'
+
+    def match(self, credential):
+        if self.field is None:
+            return any(self.value.match(credential.get(f) or '') for f in TEXT_FIELDS)
+        value = credential.get(self.field)
+        if self.field == 'modified':
+            return isinstance(value, datetime) and compare(self.op, value, self.value)
+        elif self.op == '~':
+            return bool(self.value.search(value or ''))
+        return value == self.value
+
+
+def compare(op, left, right):
+    if op == '<':
+        return left < right
+    elif op == '<=':
+        return left <= right
+    elif op == '>':
+        return left > right
+    elif op == '>=':
+        return left >= right
+    return left == right
+
+
+def parse_modified(text, now=None):
+    """Parse a `modified` comparison. Durations compare credential age, so
+    `<90d` matches credentials modified less than 90 days ago. Dates
+    compare modification dates, so `<2016-01-01` matches credentials
+    modified before 2016 and `2016-01-01` matches the whole day
+    """
+    match = COMPARISON_REGEX.match(text)
+    if not match:
+        raise QueryError(u'Invalid modified value: {}'.format(text))
+    op, value = match.group('op', 'value')
+    op = op or '='
+    duration = DURATION_REGEX.match(value)
+    if duration and op != '=':
+        now = now if now else datetime.now()
+        delta = timedelta(**{UNITS[duration.group('unit')]: int(duration.group('value'))})
+        reversed_ops = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+        return [(reversed_ops[op], now - delta)]
+    try:
+        date = datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise QueryError(u'Invalid modified value: {}'.format(text))
+    if op == '=':
+        return [('>=', date), ('<', date + timedelta(days=1))]
+    return [(op, date)]
+
+
+def parse(text, now=None):
+    """Parse query text into a list of predicates joined with AND.
+    Terms are `field:value` for equality, `field:~regex` for a regular
+    expression search and `modified:<90d` or `modified:>2016-01-01` for
+    modification times. Other terms are regular expressions matched
+    against name, login and comment. Text without field terms is a single
+    regular expression, kept as typed
+    """
+    terms = split(text)
+    if not any(term.partition(':')[0] in FIELDS for term in terms if ':' in term):
+        terms = [text]
+
+    predicates = []
+    for term in terms:
+        field, sep, value = term.partition(':')
+        if not sep or field not in FIELDS:
+            predicates.append(Predicate(None, '~', compile_regex(term)))
+        elif field == 'modified':
+            predicates.extend(Predicate(field, op, date)
+                              for op, date in parse_modified(value, now=now))
+        elif value.startswith('~'):
+            predicates.append(Predicate(field, '~', compile_regex(value[1:])))
+        else:
+            predicates.append(Predicate(field, '=', value))
+    return predicates
+
+
+def split(text):
+    """Split text on whitespace outside quotes, removing the quotes but
+    not backslashes. Unbalanced quotes leave text as a single term
+    """
+    if TERM_REGEX.sub('', text).strip():
+        return [text]
+    return [QUOTED_REGEX.sub(lambda m: m.group(1) or m.group(2) or '', term)
+            for term in TERM_REGEX.findall(text)]
+
+
+def compile_regex(text):
+    try:
+        return re.compile(text)
+    except re.error as e:
+        raise QueryError(u'Invalid regular expression {}: {}'.format(text, e))
+
+
+class Index(object):
+    """In memory hash indexes on name and login and a sorted index on
+    modified, built from database documents
+    """
+
+    def __init__(self, documents):
+        self.documents = {doc.doc_id: doc for doc in documents}
+        self.hashes = {field: {} for field in INDEXED_FIELDS}
+        for doc in self.documents.values():
+            for field in INDEXED_FIELDS:
+                self.hashes[field].setdefault(doc.get(field), set()).add(doc.doc_id)
+        modified = sorted((doc['modified'], doc.doc_id) for doc in self.documents.values()
+                          if isinstance(doc.get('modified'), datetime))
+        self.modified = [m for m, _ in modified]
+        self.modified_ids = [doc_id for _, doc_id in modified]
+
+    def lookup(self, predicate):
+        """Return document ids matching an indexed predicate"""
+        if predicate.field in self.hashes:
+            return set(self.hashes[predicate.field].get(predicate.value, ()))
+
+        lower = {'>': bisect_right, '>=': bisect_left, '=': bisect_left}
+        upper = {'<': bisect_left, '<=': bisect_right, '=': bisect_right}
+        op, value = predicate.op, predicate.value
+        start = lower[op](self.modified, value) if op in lower else 0
+        stop = upper[op](self.modified, value) if op in upper else len(self.modified)
+        return set(self.modified_ids[start:stop])
+
+    def execute(self, predicates):
+        """Intersect indexed predicates first and scan the remaining
+        candidates for predicates that are not indexed
+        """
+        candidates = None
+        for predicate in (p for p in predicates if p.indexed):
+            ids = self.lookup(predicate)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        if candidates is None:
+            documents = self.documents.values()
+        else:
+            documents = (self.documents[doc_id] for doc_id in candidates)
+        scanned = [p for p in predicates if not p.indexed]
+        return [doc for doc in documents if all(p.match(doc) for p in scanned)]
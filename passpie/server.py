@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import socket
+import sys
+import socketserver
+import stat
+import tempfile
+
+
+def is_supported():
+    return hasattr(socket, 'AF_UNIX')
+
+
+def socket_path():
+    """Default socket path, `PASSPIE_SOCKET` or a socket inside a
+    temporary directory private to the current user
+    """
+    path = os.environ.get('PASSPIE_SOCKET')
+    if not path:
+        dirname = 'passpie-{}'.format(os.getuid())
+        path = os.path.join(tempfile.gettempdir(), dirname, 'passpie.sock')
+    return path
+
+
+def is_private(dirname):
+    try:
+        info = os.stat(dirname)
+    except OSError:
+        return False
+    return info.st_uid == os.getuid() and not info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+
+def response(request_id, result=None, error=None):
+    message = {'jsonrpc': '2.0', 'id': request_id}
+    if error:
+        message['error'] = error
+    else:
+        message['result'] = result
+    return message
+
+
+class Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+            except ValueError:
+                message = response(None, error={'code': -32700, 'message': 'Parse error'})
+            else:
+                message = self.server.dispatch(request)
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class Server(socketserver.UnixStreamServer):
+    """JSON-RPC server over a unix socket. Requests are handled one at a
+    time, `invoke` runs passpie commands against a warm database and
+    returns its output and exit code
+    """
+
+    def __init__(self, path, invoke):
+        self.invoke = invoke
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, 0o700)
+        if not is_private(dirname):
+            raise OSError('socket directory is accessible by other users: {}'.format(dirname))
+        if os.path.exists(path):
+            os.remove(path)
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, Handler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, request):
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+        if method == 'ping':
+            return response(request_id, 'pong')
+        elif method == 'invoke':
+            try:
+                output, exit_code = self.invoke(**params)
+            except Exception as e:
+                logging.debug(u'invoke failed: {}'.format(e))
+                return response(request_id, error={'code': -32603, 'message': str(e)})
+            return response(request_id, {'output': output, 'exit_code': exit_code})
+        return response(request_id, error={'code': -32601, 'message': 'Method not found'})
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve(path, invoke):
+    server = Server(path, invoke)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def call(method, params=None, path=None):
+    """Send a request to a running server and return its result. Returns
+    None when no server is listening on path
+    """
+    if not is_supported():
+        return None
+    path = path if path else socket_path()
+    if not is_private(os.path.dirname(path)):
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except socket.error:
+        client.close()
+        return None
+
+    request = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or {}}
+    with client, client.makefile('rwb') as stream:
+        stream.write((json.dumps(request) + '\n').encode('utf-8'))
+        stream.flush()
+        line = stream.readline()
+
+    message = json.loads(line.decode('utf-8'))
+    if 'error' in message:
+        raise RuntimeError(message['error']['message'])
+    return message['result']
+
+
+LOCAL_COMMANDS = ('serve', 'init', 'run', 'pick')
+VALUE_OPTIONS = ('-D', '--database', '--autopull', '--autopush', '--config', '--at')
+
+
+def is_interactive(arg):
+    """Whether arg is `--interactive` or short flags including `-i`"""
+    return arg == '--interactive' or (arg[:1] == '-' and arg[1:2] != '-' and 'i' in arg)
+
+
+def is_local(command, args):
+    """Whether the command needs the client terminal, to open an editor
+    or run a program, and must not be forwarded to the server
+    """
+    return command in LOCAL_COMMANDS or any(is_interactive(arg) for arg in args)
+
+
+def subcommand(args):
+    """Return the command name in args, skipping global options"""
+    args = iter(args)
+    for arg in args:
+        if arg in VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def main(args=None):
+    """Entry point forwarding commands to `passpie serve` when it is running.
+    Commands aborted by the server when reading input run again locally.
+    The cli module is only imported when commands run in this process
+    """
+    args = sys.argv[1:] if args is None else args
+    command = subcommand(args)
+    if command and not is_local(command, args) and '--help' not in args:
+        params = {
+            'args': args,
+            'env': {k: v for k, v in os.environ.items() if k.startswith('PASSPIE_')},
+            'cwd': os.getcwd(),
+            'color': sys.stdout.isatty(),
+        }
+        try:
+            result = call('invoke', params)
+        except (RuntimeError, IOError, ValueError) as e:
+            logging.debug(u'passpie server request failed: {}'.format(e))
+            result = None
+
+        # a null exit code means the server refused a local command
+        aborted = result and result['output'].rstrip().endswith('Aborted!')
+        if result is not None and result['exit_code'] is not None and not aborted:
+            sys.stdout.write(result['output'])
+            sys.stdout.flush()
+            sys.exit(result['exit_code'])
+
+    from .cli import cli
+    cli(args)
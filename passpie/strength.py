@@ -0,0 +1,270 @@
+from collections import namedtuple
+from functools import lru_cache
+import math
+import re
+
+
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_YEAR_SPACE = 20
+REFERENCE_YEAR = 2016
+MAX_ANALYZED_LENGTH = 100
+SCORE_THRESHOLDS = (1e3 + 5, 1e6 + 5, 1e8 + 5, 1e10 + 5)
+PARALLEL_MIN_PASSWORDS = 500
+
+YEAR_REGEX = re.compile(r'19\d\d|20[0-3]\d')
+DATE_REGEX = re.compile(r'(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})')
+DIGITS_REGEX = re.compile(r'\d{4,8}')
+REPEAT_REGEX = re.compile(r'(.+?)\1+')
+
+Match = namedtuple('Match', 'start end pattern token guesses')
+Strength = namedtuple('Strength', 'guesses entropy score sequence')
+
+
+class Trie(object):
+    """Prefix tree of ranked words, finds every word starting at a
+    position of a password in one walk
+    """
+
+    def __init__(self, ranks):
+        self.root = {}
+        for word, rank in ranks.items():
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[None] = rank
+
+    def find(self, text, start):
+        node = self.root
+        for end in range(start, len(text)):
+            node = node.get(text[end])
+            if node is None:
+                return
+            if None in node:
+                yield end + 1, node[None]
+
+
+@lru_cache(maxsize=None)
+def dictionaries():
+    """Ranked dictionary tries, built on first use"""
+    from .strength_words import PASSWORDS, ENGLISH
+    tries = []
+    for words in (PASSWORDS, ENGLISH):
+        ranks = {}
+        for rank, word in enumerate(words.split(), start=1):
+            if len(word) > 2:
+                ranks.setdefault(word, rank)
+        tries.append(Trie(ranks))
+    return tries
+
+
+@lru_cache(maxsize=None)
+def keyboard_graph():
+    """Adjacent keys of a qwerty keyboard with the direction to reach them"""
+    from .strength_words import KEYBOARD_ROWS
+    positions = {}
+    for row, keys in enumerate(KEYBOARD_ROWS):
+        for chars in keys:
+            for column, char in enumerate(chars):
+                positions[char] = (row, column)
+    by_position = {}
+    for char, position in positions.items():
+        by_position.setdefault(position, []).append(char)
+
+    offsets = [(0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0)]
+    graph = {}
+    for char, (row, column) in positions.items():
+        graph[char] = {}
+        for direction, (drow, dcolumn) in enumerate(offsets):
+            for neighbor in by_position.get((row + drow, column + dcolumn), []):
+                graph[char][neighbor] = direction
+    return graph
+
+
+def variations(token, plain):
+    """Guesses multiplier of uppercase and l33t spellings of plain"""
+    multiplier = 1
+    if not token.islower() and token.lower() != token:
+        if token[0].isupper() and token[1:].lower() == token[1:] or token.isupper():
+            multiplier *= 2
+        else:
+            multiplier *= 2 ** min(sum(c.isupper() for c in token), 8)
+    substituted = sum(1 for a, b in zip(token.lower(), plain) if a != b)
+    return multiplier * (2 ** substituted)
+
+
+def dictionary_matches(password):
+    from .strength_words import L33T
+    lowered = password.lower()
+    unleeted = ''.join(L33T.get(c, c) for c in lowered)
+    texts = [lowered] if unleeted == lowered else [lowered, unleeted]
+    for trie in dictionaries():
+        for text in texts:
+            for start in range(len(text)):
+                for end, rank in trie.find(text, start):
+                    token = password[start:end]
+                    guesses = rank * variations(token, text[start:end])
+                    yield Match(start, end, 'dictionary', token, guesses)
+
+
+def keyboard_matches(password):
+    graph = keyboard_graph()
+    start = 0
+    while start < len(password) - 2:
+        end, turns, direction = start + 1, 0, None
+        while end < len(password) and password[end] in graph.get(password[end - 1], {}):
+            current = graph[password[end - 1]][password[end]]
+            if current != direction:
+                turns += 1
+                direction = current
+            end += 1
+        if end - start > 2:
+            token = password[start:end]
+            shifted = sum(1 for c in token if not c.islower() and not c.isdigit())
+            guesses = len(graph) // 2 * 4 ** turns * (end - start) * (2 if shifted else 1)
+            yield Match(start, end, 'keyboard', token, guesses)
+            start = end - 1
+        else:
+            start += 1
+
+
+def sequence_matches(password):
+    start = 0
+    while start < len(password) - 2:
+        delta = ord(password[start + 1]) - ord(password[start])
+        end = start + 1
+        while abs(delta) == 1 and end < len(password) and \
+                ord(password[end]) - ord(password[end - 1]) == delta:
+            end += 1
+        if end - start > 2:
+            token = password[start:end]
+            if token[0] in 'aAzZ019':
+                base = 4
+            elif token[0].isdigit():
+                base = 10
+            else:
+                base = 26
+            yield Match(start, end, 'sequence', token, base * len(token) * (2 if delta < 0 else 1))
+            start = end - 1
+        else:
+            start += 1
+
+
+def repeat_matches(password):
+    for match in REPEAT_REGEX.finditer(password):
+        token, base = match.group(0), match.group(1)
+        if len(token) > 2:
+            guesses = estimate(base).guesses * (len(token) // len(base))
+            yield Match(match.start(), match.end(), 'repeat', token, guesses)
+
+
+def year_space(year):
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+def date_year(parts):
+    """Year of a date made of day, month and year parts in any order"""
+    for day, month, year in ((0, 1, 2), (1, 0, 2), (1, 2, 0), (2, 1, 0)):
+        d, m, y = int(parts[day]), int(parts[month]), parts[year]
+        if 1 <= d <= 31 and 1 <= m <= 12 and len(y) in (2, 4):
+            year_value = int(y)
+            if len(y) == 2:
+                year_value += 1900 if year_value > 50 else 2000
+            if 1900 <= year_value <= 2039:
+                return year_value
+
+
+def date_matches(password):
+    for match in YEAR_REGEX.finditer(password):
+        guesses = year_space(int(match.group(0)))
+        yield Match(match.start(), match.end(), 'date', match.group(0), guesses)
+    for match in DATE_REGEX.finditer(password):
+        year = date_year(match.group(1, 3, 4))
+        if year:
+            guesses = 365 * year_space(year) * 4
+            yield Match(match.start(), match.end(), 'date', match.group(0), guesses)
+    for match in DIGITS_REGEX.finditer(password):
+        token = match.group(0)
+        for split in ((2, 4), (2, 3), (1, 3), (1, 2), (4, 6), (4, 5)):
+            if split[1] < len(token):
+                year = date_year((token[:split[0]], token[split[0]:split[1]], token[split[1]:]))
+                if year:
+                    guesses = 365 * year_space(year)
+                    yield Match(match.start(), match.end(), 'date', token, guesses)
+                    break
+
+
+MATCHERS = [dictionary_matches, keyboard_matches, sequence_matches, repeat_matches, date_matches]
+
+
+def bruteforce(password, start, end):
+    guesses = BRUTEFORCE_CARDINALITY ** (end - start)
+    return Match(start, end, 'bruteforce', password[start:end], guesses)
+
+
+def minimum_guesses(match):
+    if match.pattern == 'bruteforce':
+        return match.guesses
+    minimum = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if len(match.token) == 1 \
+        else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+    return max(match.guesses, minimum)
+
+
+@lru_cache(maxsize=1024)
+def estimate(password):
+    """Estimate guesses needed to crack password zxcvbn style: the least
+    guessable sequence of dictionary, keyboard, sequence, repeat, date
+    and bruteforce matches covering it
+    """
+    if not password:
+        return Strength(1, 0.0, 0, ())
+    analyzed, tail = password[:MAX_ANALYZED_LENGTH], password[MAX_ANALYZED_LENGTH:]
+    length = len(analyzed)
+
+    ending = [[] for _ in range(length + 1)]
+    for matcher in MATCHERS:
+        for match in matcher(analyzed):
+            ending[match.end].append(match)
+
+    # best[k][l]: (product of guesses, sequence) of prefix k made of l matches
+    best = [{} for _ in range(length + 1)]
+    best[0][0] = (1, ())
+
+    def update(match):
+        for count, (product, sequence) in list(best[match.start].items()):
+            candidate = product * minimum_guesses(match)
+            current = best[match.end].get(count + 1)
+            if current is None or candidate < current[0]:
+                best[match.end][count + 1] = (candidate, sequence + (match,))
+
+    for end in range(1, length + 1):
+        for match in ending[end]:
+            update(match)
+        for start in range(end):
+            update(bruteforce(analyzed, start, end))
+
+    guesses, sequence = min(
+        (math.factorial(count) * product + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (count - 1),
+         sequence)
+        for count, (product, sequence) in best[length].items())
+    if tail:
+        rest = estimate(tail)
+        guesses, sequence = guesses * rest.guesses, sequence + rest.sequence
+    score = sum(1 for threshold in SCORE_THRESHOLDS if guesses >= threshold)
+    return Strength(guesses, math.log(guesses, 2), score, sequence)
+
+
+def score(password):
+    return estimate(password).score
+
+
+def score_many(passwords, workers=None):
+    """Score passwords, in worker processes for large lists"""
+    passwords = list(passwords)
+    if len(passwords) < PARALLEL_MIN_PASSWORDS:
+        return [score(p) for p in passwords]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(score, passwords, chunksize=64))
@@ -0,0 +1,93 @@
+# Ranked word lists used by the strength checker, most common first
+PASSWORDS = """
+123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon
+123123 baseball abc123 football monkey letmein shadow master 696969 mustang
+666666 qwertyuiop 123321 1234567890 pussy superman 654321 1qaz2wsx 7777777
+fuckyou qazwsx jordan jennifer 123qwe 121212 killer trustno1 hunter harley
+zxcvbnm asdfgh buster andrew batman soccer tigger charlie robert thomas hockey
+ranger daniel starwars klaster 112233 george computer michelle jessica pepper
+1111 zxcvbn 555555 11111111 131313 freedom 777777 pass maggie 159753 aaaaaa
+ginger princess joshua cheese amanda summer love ashley 6969 nicole chelsea
+biteme matthew access yankees 987654321 dallas austin thunder taylor matrix
+minecraft william corvette hello martin heather secret fucker merlin diamond
+1234qwer gfhjkm hammer silver 222222 88888888 anthony justin test bailey
+q1w2e3r4t5 patrick internet scooter orange 11111 golfer cookie richard samantha
+bigdog guitar jackson whatever mickey chicken sparky snoopy maverick phoenix
+camaro sexy peanut morgan welcome falcon cowboy ferrari samsung andrea smokey
+steelers joseph mercedes dakota arsenal eagles melissa boomer booboo spider
+nascar monster tigers yellow xxxxxx 123123123 gateway marina diablo bulldog
+qwer1234 compaq purple hardcore banana junior hannah 123654 porsche lakers
+iceman money cowboys 987654 london tennis 999999 ncc1701 coffee scooby 0000
+miller boston q1w2e3r4 fuckoff brandon yamaha chester mother forever johnny
+edward 333333 oliver redsox player nikita knight fender barney midnight please
+brandy chicago badboy iwantu slayer rangers charles angel flower bigdaddy rabbit
+wizard bigdick jasper enter rachel chris steven winner adidas victoria natasha
+1q2w3e4r jasmine winter prince panties marine ghbdtn fishing cocacola casper
+james 232323 raiders 888888 marlboro gandalf asdfasdf crystal 87654321 12344321
+sexsex golden blowme bigtits 8675309 panther lauren angela bitch spanky thx1138
+angels madison winston shannon mike toyota blowjob jordan23 canada sophie
+apples dick tiger razz 123abc pokemon qazxsw 55555 qwaszx muffin johnson murphy
+cooper jonathan liverpoo david danielle 159357 jackie 1990 123456a 789456
+turtle horny abcd1234 scorpion qazwsxedc 101010 butter carlos password1 dennis
+slipknot qwerty123 booger asdf 1991 black startrek 12341234 cameron newyork
+rainbow nathan john 1992 rocket viking redskins butthead asdfghjkl 1212 sierra
+peaches gemini doctor wilson sandra helpme qwertyui victor florida dolphin
+pookie captain tucker blue liverpool theman bandit dolphins maddog packers
+jaguar lovers nicholas united tiffany maxwell zzzzzz nirvana jeremy suckit
+stupid porn monica elephant giants jackass hotdog rosebud success debbie
+mountain 444444 xxxxxxxx warrior 1q2w3e4r5t q1w2e3 123456q albert metallic
+lucky azerty 7777 shithead alex bond007 alexis 1111111 samson 5150 willie
+scorpio bonnie gators benjamin voodoo driver dexter 2112 jason calvin freddy
+212121 creative 12345a sydney rush2112 1989 asdfghjk red123 bubba 4815162342
+passw0rd trouble gunner happy fucking gordon legend jessie stella qwert eminem
+arthur apple nissan bullshit bear america 1qazxsw2 nothing parker 4444 rebecca
+qweqwe garfield 01012011 beavis 69696969 jack asdasd december 2222 102030
+252525 11223344 magic apollo skippy 315475 girls kitten golf copper braves
+shelby godzilla beaver fred tomcat august buddy airborne 1993 1988 lifehack
+qqqqqq brooklyn animal platinum phantom online xavier darkness blink182 power
+fish green 789456123 voyager police travis 12qwaszx heaven snowball lover
+abcdef 00000 pakistan 007007 walter playboy blazer cricket sniper hooters
+donkey willow loveme saturn therock redwings bigboy pumpkin trinity williams
+tits nintendo digital destiny topgun runner marvin guinness chance bubbles
+testing fire november minnie winners pirate loveyou flyers master1 admin root
+changeme welcome1 iloveyou letmein1 trustme secret1 login default
+"""
+
+ENGLISH = """
+the of and to in is you that it he was for on are as with his they at be this
+have from or one had by word but not what all were we when your can said there
+use an each which she do how their if will up other about out many then them
+these so some her would make like him into time has look two more write go see
+number no way could people my than first water been call who oil its now find
+long down day did get come made may part over new sound take only little work
+know place year live me back give most very after thing our just name good
+sentence man think say great where help through much before line right too mean
+old any same tell boy follow came want show also around form three small set
+put end does another well large must big even such because turn here why ask
+went men read need land different home us move try kind hand picture again
+change off play spell air away animal house point page letter mother answer
+found study still learn should america world high every near add food between
+own below country plant last school father keep tree never start city earth
+eye light thought head under story saw left few while along might close
+something seem next hard open example begin life always those both paper
+together got group often run important until children side feet car mile night
+walk white sea began grow took river four carry state once book hear stop
+without second later miss idea enough eat face watch far indian really almost
+let above girl sometimes mountain cut young talk soon list song being leave
+family company office business market money summer winter spring autumn
+monday friday sunday january february march april june july october
+secret love baby sunshine flower princess dragon shadow master monster angel
+password welcome hello admin server system network computer internet email
+letmein access login user guest private public master super account
+"""
+
+# common substitutions to read l33t spellings as letters
+L33T = {'4': 'a', '@': 'a', '8': 'b', '(': 'c', '3': 'e', '6': 'g', '1': 'i',
+        '!': 'i', '|': 'l', '0': 'o', '$': 's', '5': 's', '7': 't', '+': 't', '2': 'z'}
+
+KEYBOARD_ROWS = [
+    ('`1234567890-=', '~!@#$%^&*()_+'),
+    ('qwertyuiop[]\\', 'QWERTYUIOP{}|'),
+    ("asdfghjkl;'", 'ASDFGHJKL:"'),
+    ('zxcvbnm,./', 'ZXCVBNM<>?'),
+]
@@ -1,7 +1,33 @@
-from tabulate import tabulate
+from itertools import chain, islice
+import json
+
 import click
 
 
+OUTPUT_FORMATS = ['table', 'json', 'jsonl', 'tsv']
+SAMPLE_SIZE = 1000
+MIN_PADDING = 2
+
+
+def tsv_escape(value):
+    value = u'' if value is None else u'{}'.format(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def build_line(fmt, widths, linefmt):
+    begin, fill, sep, end = linefmt
+    cells = [fill * (w + 2 * fmt.padding) for w in widths]
+    return (begin + sep.join(cells) + end).rstrip()
+
+
+def build_row(fmt, widths, cells, rowfmt):
+    begin, sep, end = rowfmt
+    padding = u' ' * fmt.padding
+    cells = [padding + c + u' ' * (w - len(click.unstyle(c))) + padding
+             for w, c in zip(widths, cells)]
+    return (begin + sep.join(cells) + end).rstrip()
+
+
 class Table(object):
 
     def __init__(self, headers,
@@ -15,12 +41,91 @@ class Table(object):
         self.hidden = hidden if hidden else []
         self.hidden_string = hidden_string
         self.table_format = table_format
-        self.missing = missing
+        self.missing = missing if missing is not None else ''
 
     def colorize(self, key, text):
         return click.style(text, fg=self.colors.get(key))
 
+    def values(self, entry):
+        return [self.hidden_string if header in self.hidden else entry.get(header)
+                for header in self.headers]
+
+    def stream(self, data, output_format):
+        """Yield lines of data rows as json, jsonl or tsv as they are
+        consumed from data, without sorting, styling or measuring columns
+        """
+        if output_format == 'tsv':
+            yield u'\t'.join(self.headers)
+            for entry in data:
+                yield u'\t'.join(tsv_escape(v) for v in self.values(entry))
+        elif output_format == 'jsonl':
+            for entry in data:
+                yield json.dumps(dict(zip(self.headers, self.values(entry))), default=str)
+        elif output_format == 'json':
+            yield u'['
+            previous = None
+            for entry in data:
+                if previous is not None:
+                    yield u'  {},'.format(previous)
+                previous = json.dumps(dict(zip(self.headers, self.values(entry))), default=str)
+            if previous is not None:
+                yield u'  {}'.format(previous)
+            yield u']'
+
+    def cells(self, entry):
+        cells = []
+        for header in self.headers:
+            value = entry.get(header)
+            if header in self.hidden:
+                value = self.hidden_string
+            elif value is None:
+                value = self.missing
+            elif header in self.colors:
+                value = self.colorize(header, value)
+            cells.append(u'{}'.format(value))
+        return cells
+
+    def render_rows(self, data, sample_size=SAMPLE_SIZE):
+        """Yield table lines while consuming data. Column widths are
+        computed from the first `sample_size` rows, wider cells further
+        down stretch their own row instead of being cut
+        """
+        from tabulate import _table_formats
+
+        # formats with callable or centered parts are rendered by tabulate
+        fmt = _table_formats.get(self.table_format)
+        if fmt is None or self.table_format == 'pretty' or any(callable(part) for part in fmt):
+            output = self.render(list(data))
+            for line in output.splitlines() if output else []:
+                yield line
+            return
+
+        data = iter(data)
+        sample = [self.cells(entry) for entry in islice(data, sample_size)]
+        if not sample:
+            return
+        widths = [len(h) + MIN_PADDING for h in self.headers]
+        for cells in sample:
+            widths = [max(w, len(click.unstyle(c))) for w, c in zip(widths, cells)]
+
+        hidden = fmt.with_header_hide or []
+        if fmt.lineabove and 'lineabove' not in hidden:
+            yield build_line(fmt, widths, fmt.lineabove)
+        headers = [click.style(h.title(), bold=True) for h in self.headers]
+        yield build_row(fmt, widths, headers, fmt.headerrow)
+        if fmt.linebelowheader:
+            yield build_line(fmt, widths, fmt.linebelowheader)
+        rows = chain(sample, (self.cells(entry) for entry in data))
+        for index, cells in enumerate(rows):
+            if index and fmt.linebetweenrows:
+                yield build_line(fmt, widths, fmt.linebetweenrows)
+            yield build_row(fmt, widths, cells, fmt.datarow)
+        if fmt.linebelow and 'linebelow' not in hidden:
+            yield build_line(fmt, widths, fmt.linebelow)
+
     def render(self, data):
+        from tabulate import tabulate
+
         data = sorted(data, key=lambda c: c[self.headers[0]])
         rows = []
         for entry in data:
@@ -9,6 +9,12 @@ from rstr import Rstr
 
 from ._compat import which
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
 rstr = Rstr(SystemRandom())
 
 
@@ -18,6 +24,12 @@ import_module = __import__
 def genpass(pattern=r'[\w]{32}'):
     """generates a password with random chararcters
     """
+    from . import generator
+
+    try:
+        return generator.compile(pattern).generate()
+    except generator.UnsupportedPattern:
+        pass
     try:
         return rstr.xeger(pattern)
     except re.error as e:
@@ -38,6 +50,30 @@ def mkdir_open(path, mode="r"):
         yield fd
 
 
+@contextmanager
+def lock(path, filename='.passpie.lock'):
+    """Hold an exclusive advisory lock on database directory path. The lock
+    file lives in `.git` when path is a repository so it is never committed
+    """
+    if not os.path.isdir(path):
+        yield
+        return
+    gitdir = os.path.join(path, '.git')
+    lockdir = gitdir if os.path.isdir(gitdir) else path
+    with open(os.path.join(lockdir, filename), 'a') as lockfile:
+        if fcntl:
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            msvcrt.locking(lockfile.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                msvcrt.locking(lockfile.fileno(), msvcrt.LK_UNLCK, 1)
+
+
 def ensure_dependencies():
     try:
         assert which('gpg') or which('gpg2')
@@ -2,6 +2,7 @@ import click
 
 from .history import clone
 from . import config
+from .query import QueryError, parse
 
 
 def validate_remote(ctx, param, value):
@@ -26,6 +27,34 @@ def validate_cols(ctx, param, value):
             raise click.BadParameter('missing mandatory column: {}'.format(e))
 
 
+def validate_env(ctx, param, value):
+    try:
+        variables = [v.split('=', 1) for v in value]
+        for name, fullname in variables:
+            assert name and fullname
+        return [tuple(v) for v in variables]
+    except (ValueError, AssertionError):
+        raise click.BadParameter('env need to be in format VAR=fullname')
+
+
+def validate_query(ctx, param, value):
+    try:
+        parse(value)
+    except QueryError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
+def validate_importer(ctx, param, value):
+    from . import importers
+
+    if value:
+        names = importers.get_names()
+        if value not in names:
+            raise click.BadParameter('{} is not one of: {}'.format(value, ', '.join(names)))
+        return value
+
+
 def validate_config(ctx, param, value):
     overrides = {k: v for k, v in ctx.params.items() if v}
     configuration = {}
@@ -36,9 +65,9 @@ def validate_config(ctx, param, value):
     configuration.update(overrides)                                  # Command line options
 
     if config.is_repo_url(configuration['path']) is True:
-        temporary_path = clone(configuration['path'], depth="1")
+        temporary_path = clone(configuration['path'], depth="1", partial=True)
         configuration['path'] = temporary_path
+        configuration['sparse'] = True
 
     configuration.update(config.read(configuration['path']))
-    configuration = config.setup_crypt(configuration)
-    return configuration
+    return config.Configuration(configuration)
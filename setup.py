@@ -71,7 +71,7 @@ setup(
     packages=find_packages(),
     entry_points={
         'console_scripts': [
-            'passpie=passpie.cli:cli',
+            'passpie=passpie.server:main',
         ]
     },
     install_requires=requirements,
@@ -0,0 +1,54 @@
+import hashlib
+
+import pytest
+
+from passpie import breach
+
+
+def sha1(password):
+    return hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+
+
+@pytest.fixture
+def corpus_path(tmpdir):
+    counts = {sha1(p): i + 1 for i, p in enumerate(['password', 'qwerty', '123456', 'letmein'])}
+    lines = [u'{}:{}\r\n'.format(h, counts[h]) for h in sorted(counts)]
+    path = tmpdir.join('pwned-passwords-sha1-ordered-by-hash.txt')
+    path.write(u''.join(lines))
+    return str(path)
+
+
+def test_corpus_binary_searches_sorted_hashes(corpus_path):
+    with breach.Corpus(corpus_path) as corpus:
+        assert corpus.algorithm == 'sha1'
+        assert corpus.count('password') == 1
+        assert corpus.count('qwerty') == 2
+        assert corpus.count('123456') == 3
+        assert corpus.count('letmein') == 4
+        assert corpus.count('x8#Kq!2vLz@9pW') == 0
+
+
+def test_corpus_reads_ntlm_hashes(tmpdir):
+    path = tmpdir.join('ntlm.txt')
+    path.write(u'8846F7EAEE8FB117AD06BDD830B7586C:3\n')
+
+    with breach.Corpus(str(path)) as corpus:
+        assert corpus.algorithm == 'ntlm'
+        assert corpus.count('password') == 3
+        assert corpus.count('Password') == 0
+
+
+def test_corpus_raises_corpus_error_on_unknown_format(tmpdir):
+    empty, invalid = tmpdir.join('empty.txt'), tmpdir.join('invalid.txt')
+    empty.write(u'')
+    invalid.write(u'not a hash\n')
+
+    with pytest.raises(breach.CorpusError):
+        breach.Corpus(str(empty))
+    with pytest.raises(breach.CorpusError):
+        breach.Corpus(str(invalid))
+
+
+def test_md4_matches_reference_digests():
+    assert breach.md4(b'').hex() == '31d6cfe0d16ae931b73c59d7e0c089c0'
+    assert breach.md4(b'abc').hex() == 'a448017aaf21d8525fc10ae87aa6729d'
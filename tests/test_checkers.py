@@ -2,13 +2,33 @@ from passpie import checkers
 from datetime import datetime, timedelta
 
 
-def test_repeated_deepcopy_credentials(mocker):
-    mock_deepcopy = mocker.patch('passpie.checkers.deepcopy')
+def test_repeated_returns_copies_without_changing_credentials(mocker):
     credentials = [{'fullname': 'foo@example.com', 'password': 's3cr3t'}]
 
-    checkers.repeated(credentials, limit=1)
-    assert mock_deepcopy.called
-    mock_deepcopy.assert_called_once_with(credentials)
+    result_credentials = checkers.repeated(credentials, limit=1)
+    assert result_credentials == [{'fullname': 'foo@example.com', 'password': 's3cr3t',
+                                   'repeated': None}]
+    assert credentials == [{'fullname': 'foo@example.com', 'password': 's3cr3t'}]
+
+
+def test_repeated_lists_other_fullnames_with_same_password_up_to_limit(mocker):
+    credentials = [
+        {'fullname': 'a@example.com', 'password': 'same'},
+        {'fullname': 'b@example.com', 'password': 'other'},
+        {'fullname': 'c@example.com', 'password': 'same'},
+        {'fullname': 'd@example.com', 'password': 'same'},
+        {'fullname': 'a@example.com', 'password': 'same'},
+    ]
+
+    result = [c['repeated'] for c in checkers.repeated(credentials, limit=5)]
+    assert result == [
+        ['c@example.com', 'd@example.com'],
+        None,
+        ['a@example.com', 'd@example.com', 'a@example.com'],
+        ['a@example.com', 'c@example.com', 'a@example.com'],
+        ['c@example.com', 'd@example.com'],
+    ]
+    assert checkers.repeated(credentials, limit=1)[2]['repeated'] == ['a@example.com']
 
 
 def test_modified_sets_credential_modifield_field_none(mocker):
@@ -31,10 +51,60 @@ def test_modified_sets_credential_modifield_field__with_string_days_count(mocker
     assert result_credentials == expected_credentials
 
 
-def test_modified_deepcopy_credentials(mocker):
-    mock_deepcopy = mocker.patch('passpie.checkers.deepcopy')
-    credentials = [{'modified': datetime.now()}]
+def test_modified_returns_copies_without_changing_credentials(mocker):
+    modified = datetime.now()
+    credentials = [{'modified': modified}]
 
     checkers.modified(credentials, days=1)
-    assert mock_deepcopy.called
-    mock_deepcopy.assert_called_once_with(credentials)
+    assert credentials == [{'modified': modified}]
+
+
+def test_repeated_groups_credentials_by_given_field(mocker):
+    credentials = [
+        {'fullname': 'a@example.com', 'password': 'x', 'fingerprint': 'same'},
+        {'fullname': 'b@example.com', 'password': 'y', 'fingerprint': 'same'},
+    ]
+
+    result = checkers.repeated(credentials, limit=5, field='fingerprint')
+    assert [c['repeated'] for c in result] == [['b@example.com'], ['a@example.com']]
+
+
+def test_weak_flags_scores_lower_than_min_score(mocker):
+    credentials = [{'fullname': 'a@example.com', 'score': 1},
+                   {'fullname': 'b@example.com', 'score': 3},
+                   {'fullname': 'c@example.com', 'score': None}]
+
+    result = [c['strength'] for c in checkers.weak(credentials, min_score=2)]
+    assert result == ['1/4', None, None]
+    assert 'strength' not in credentials[0]
+
+
+def test_levenshtein_stops_early_past_limit(mocker):
+    assert checkers.levenshtein('Summer2023!', 'Summer2024!') == 1
+    assert checkers.levenshtein('kitten', 'sitting') == 3
+    assert checkers.levenshtein('kitten', 'sitting', limit=1) == 2
+    assert checkers.levenshtein('short', 'much longer text', limit=2) == 3
+
+
+def test_deletion_index_finds_words_within_distance(mocker):
+    words = ['Summer2023!', 'Summer2024!', 'Sumer2024', 'Winter2024!', 'unrelated']
+    index = checkers.DeletionIndex(words, distance=2)
+
+    assert index.search('Summer2023!') == [(0, 'Summer2023!'), (1, 'Summer2024!')]
+    assert index.search('Summer2024') == [(1, 'Sumer2024'), (1, 'Summer2024!'),
+                                          (2, 'Summer2023!')]
+
+
+def test_similar_lists_fullnames_with_near_duplicate_passwords(mocker):
+    credentials = [
+        {'fullname': 'a@example.com', 'password': 'Summer2023!'},
+        {'fullname': 'b@example.com', 'password': 'Summer2024!'},
+        {'fullname': 'c@example.com', 'password': 'Summer2024!'},
+        {'fullname': 'd@example.com', 'password': 'Winter1999?'},
+        {'fullname': 'e@example.com', 'password': 'abc'},
+        {'fullname': 'f@example.com', 'password': 'abd'},
+    ]
+
+    result = [c['similar'] for c in checkers.similar(credentials, limit=5)]
+    assert result == [['b@example.com', 'c@example.com'], ['a@example.com'],
+                      ['a@example.com'], None, None, None]
@@ -1,4 +1,8 @@
 import csv
+import os
+import subprocess
+import sys
+import time
 
 import click
 from click.testing import CliRunner
@@ -65,6 +69,21 @@ def test_cli_instantiate_database_with_configuration(mocker, mock_config, irunne
     mock_database.assert_called_once_with(configuration.values)
 
 
+def test_cli_reuses_warm_database_only_with_same_configuration(mocker, mock_config, irunner):
+    mock_database = mocker.patch('passpie.cli.Database')
+    mocker.patch('passpie.cli.logging')
+
+    with mock_config():
+        irunner.invoke(cli.cli)
+        warm = mocker.Mock(config=mock_database.call_args[0][0])
+        mock_database.reset_mock()
+        irunner.invoke(cli.cli, obj=warm)
+        assert mock_database.called is False
+        irunner.invoke(cli.cli, ['--autopush', 'origin/master'], obj=warm)
+
+    assert mock_database.call_args[0][0]['autopush'] == ('origin', 'master')
+
+
 def test_cli_sets_logging_verbose_level_to_info_when_passing_one_v(mocker, mock_config, irunner):
     mock_logging = mocker.patch('passpie.cli.logging')
     configuration = {
@@ -184,7 +203,7 @@ class CliAddTests(object):
 
     def test_add_credentials_with_copy_copy_to_clipboard(self, mocker, mock_config, irunner):
         mock_genpass = mocker.patch('passpie.cli.genpass', return_value='random')
-        mock_copy = mocker.patch('passpie.cli.clipboard.copy')
+        mock_copy = mocker.patch('passpie.clipboard.copy')
 
         with mock_config() as cfg:
             pattern = cfg['genpass_pattern']
@@ -241,3 +260,532 @@ def test_update_credentials_encrypt_password(mocker, creds, mock_config, irunner
         assert mock_encrypt.called is True
         args, _ = mock_encrypt.call_args
         assert args[0] == password
+
+
+DEFERRED_MODULES = ['tabulate', 'passpie.breach', 'passpie.checkers', 'passpie.clipboard',
+                    'passpie.fingerprint', 'passpie.fuzzy', 'passpie.generator',
+                    'passpie.importers', 'passpie.strength']
+LOADED_MODULES_SCRIPT = """
+import sys
+from passpie.cli import cli
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def run_passpie_modules(args, env):
+    cmd = [sys.executable, '-c', LOADED_MODULES_SCRIPT] + args
+    output = subprocess.check_output(cmd, env=env).decode('utf-8')
+    output, _, modules = output.rstrip().rpartition('\n')
+    return output, modules.split()
+
+
+def test_help_and_list_commands_do_not_load_modules_of_other_commands(tmpdir):
+    database = tmpdir.mkdir('database')
+    database.mkdir('example.com').join('foo.pass').write(
+        'name: example.com\nlogin: foo\nfullname: foo@example.com\n'
+        'password: s3cr3t\ncomment: ""\n')
+    env = dict(os.environ, HOME=str(tmpdir), PASSPIE_DATABASE=str(database))
+
+    output, modules = run_passpie_modules(['--help'], env)
+    assert 'Usage' in output
+    assert [m for m in DEFERRED_MODULES if m in modules] == []
+
+    output, modules = run_passpie_modules(['list', '--format', 'tsv'], env)
+    assert 'example.com' in output
+    assert [m for m in DEFERRED_MODULES if m in modules] == []
+
+    output, modules = run_passpie_modules(['list'], env)
+    assert 'example.com' in output
+    assert [m for m in DEFERRED_MODULES if m in modules] == ['tabulate']
+
+
+@pytest.mark.parametrize('option', ['--limit', '--offset'])
+def test_log_rejects_negative_limit_and_offset(mocker, mock_config, irunner, option):
+    mock_repository = mocker.patch('passpie.database.Repository')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['log', option, '-1'])
+
+    assert result.exit_code == 2
+    assert mock_repository().log.called is False
+
+
+@pytest.mark.parametrize('args', [['run', 'ls'], ['-D', 'path', 'run', 'ls'], ['-v', 'pick'],
+                                  ['add', 'foo@example.com', '-i'],
+                                  ['update', '-i', '--name', 'bar', 'foo@example.com']])
+def test_serve_invoke_refuses_commands_needing_client_terminal(mocker, mock_config, args):
+    mock_runner = mocker.patch('click.testing.CliRunner')
+
+    with mock_config():
+        output, exit_code = cli.serve_invoke(mocker.Mock(), args)
+
+    assert exit_code is None
+    assert mock_runner.called is False
+
+
+def test_serve_invoke_runs_command_with_warm_database(mocker, mock_config, tmpdir):
+    db = mocker.Mock()
+    mock_invoke = mocker.patch('click.testing.CliRunner.invoke',
+                               return_value=mocker.Mock(output='output', exit_code=0))
+
+    with mock_config():
+        result = cli.serve_invoke(db, ['list'], env={'PASSPIE_VERBOSE': '1'}, cwd=str(tmpdir))
+
+    assert result == ('output', 0)
+    assert mock_invoke.call_args[1]['obj'] is db
+    assert mock_invoke.call_args[1]['env']['PASSPIE_VERBOSE'] == '1'
+
+
+@pytest.mark.parametrize('args', [['copy', 'foo@example.com'], ['batch']])
+def test_serve_invoke_aborts_commands_reading_input(mocker, mock_config, irunner, args):
+    mocker.patch('passpie.cli.Database.credential', return_value={'password': 'encrypted'})
+
+    with mock_config():
+        output, exit_code = cli.serve_invoke(mocker.Mock(), args)
+
+    assert exit_code == 1
+    assert output.rstrip().endswith('Aborted!')
+
+
+def test_batch_runs_operations_in_one_flush_and_one_commit(mocker, mock_config, irunner):
+    import json
+    mock_repository = mocker.patch('passpie.database.Repository')
+    mocker.patch('passpie.cli.encrypt', return_value='encrypted')
+    mocker.patch('passpie.cli.genpass', return_value='random')
+    operations = "\n".join([
+        '{"op": "add", "fullname": "foo@example.com", "password": "s3cr3t"}',
+        '{"op": "add", "fullname": "bar@example.com", "random": true}',
+        '{"op": "update", "fullname": "foo@example.com", "comment": "updated"}',
+        '{"op": "remove", "fullname": "nobody@example.com"}',
+        '{"op": "unknown"}',
+    ])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['batch'], input=operations)
+
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert result.exit_code == 0
+    assert [r['ok'] for r in results] == [True, True, True, False, False]
+    assert results[3]['error'] == "Credential 'nobody@example.com' not found"
+    assert mock_repository().commit.call_count == 1
+    kwargs = mock_repository().commit.call_args[1]
+    assert kwargs['message'] == 'Batch of 3 operations'
+    assert sorted(os.path.basename(path) for path in kwargs['paths']) == ['bar.pass', 'foo.pass']
+
+
+def test_rotate_encrypts_new_passwords_in_one_flush_and_one_commit(mocker, mock_config, irunner):
+    import json
+    mock_repository = mocker.patch('passpie.database.Repository')
+    mocker.patch('passpie.cli.encrypt', return_value='encrypted')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=None)
+    mock_generate_many = mocker.patch('passpie.generator.Generator.generate_many',
+                                      return_value=['new1', 'new2'])
+    mock_encrypt_many = mocker.patch('passpie.cli.encrypt_many',
+                                     side_effect=lambda items, **kw: [i.upper() for i in items])
+    operations = "\n".join([
+        '{"op": "add", "fullname": "foo@example.com", "password": "s3cr3t"}',
+        '{"op": "add", "fullname": "bar@example.com", "password": "s3cr3t"}',
+        '{"op": "add", "fullname": "foo@example.org", "password": "s3cr3t"}',
+    ])
+
+    with mock_config() as config:
+        irunner.invoke(cli.cli, ['batch'], input=operations)
+        mock_repository().commit.reset_mock()
+        result = irunner.invoke(cli.cli, ['rotate', 'name:example.com', '--report', 'report.json'])
+        db = cli.Database(config.values)
+        passwords = {c['fullname']: c['password'] for c in db.credentials()}
+        with open('report.json') as f:
+            report = json.load(f)
+
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ['bar@example.com', 'foo@example.com']
+    mock_generate_many.assert_called_once_with(2)
+    assert mock_encrypt_many.call_args[0][0] == ['new1', 'new2']
+    assert passwords == {'bar@example.com': 'NEW1', 'foo@example.com': 'NEW2',
+                         'foo@example.org': 'encrypted'}
+    mock_repository().commit.assert_called_once_with(
+        message='Rotated 2 credentials',
+        paths=[db.filename('bar@example.com'), db.filename('foo@example.com')])
+    assert report['rotated'] == [{'from': 'bar@example.com', 'to': 'bar@example.com'},
+                                 {'from': 'foo@example.com', 'to': 'foo@example.com'}]
+    assert report['entropy'] > 100
+    assert 'NEW1' not in json.dumps(report)
+
+
+def test_rotate_falls_back_to_genpass_for_unsupported_patterns(mocker, mock_config, irunner):
+    from passpie import generator
+    mocker.patch('passpie.cli.Database.find', return_value=[
+        {'fullname': 'foo@example.com', 'name': 'example.com', 'login': 'foo'}])
+    mocker.patch('passpie.generator.compile',
+                 side_effect=generator.UnsupportedPattern('unsupported'))
+    mocker.patch('passpie.cli.genpass', return_value='generated')
+    mock_encrypt_many = mocker.patch('passpie.cli.encrypt_many', return_value=['encrypted'])
+    mocker.patch('passpie.cli.fingerprint_key', return_value=None)
+    mocker.patch('passpie.cli.Database.update')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['rotate', 'name:example.com', '--pattern', '(a|b)+'])
+
+    assert result.exit_code == 0
+    assert mock_encrypt_many.call_args[0][0] == ['generated']
+
+
+def test_rotate_dry_run_changes_nothing(mocker, mock_config, irunner):
+    mocker.patch('passpie.cli.Database.find', return_value=[
+        {'fullname': 'foo@example.com', 'name': 'example.com', 'login': 'foo'}])
+    mock_encrypt_many = mocker.patch('passpie.cli.encrypt_many')
+    mock_update = mocker.patch('passpie.cli.Database.update')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['rotate', 'name:example.com', '--dry-run'])
+
+    assert result.exit_code == 0
+    assert result.output == 'foo@example.com\n'
+    assert mock_encrypt_many.called is False
+    assert mock_update.called is False
+
+
+def test_batch_checks_passphrase_once_for_get_operations(mocker, mock_config, creds, irunner):
+    import json
+    credentials = creds.make(2)
+    mocker.patch('passpie.cli.Database.credential', side_effect=credentials)
+    mock_ensure_passphrase = mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.decrypt', return_value='decrypted')
+    operations = "\n".join(
+        json.dumps({'op': 'get', 'fullname': c['fullname']}) for c in credentials)
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['batch', '--passphrase', 'passphrase'],
+                                input=operations)
+
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert [r['password'] for r in results] == ['decrypted', 'decrypted']
+    mock_ensure_passphrase.assert_called_once_with('passphrase', mocker.ANY)
+
+
+def test_batch_requires_passphrase_option_for_get_operations_from_stdin(mocker, mock_config,
+                                                                        irunner):
+    import json
+    mock_repository = mocker.patch('passpie.database.Repository')
+    mocker.patch('passpie.cli.encrypt', return_value='encrypted')
+    mock_prompt = mocker.patch('passpie.cli.click.prompt')
+    operations = "\n".join([
+        '{"op": "add", "fullname": "foo@example.com", "password": "s3cr3t"}',
+        '{"op": "get", "fullname": "foo@example.com"}',
+    ])
+
+    with mock_config() as config:
+        result = irunner.invoke(cli.cli, ['batch'], input=operations)
+        db = cli.Database(config.values)
+
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert result.exit_code == 0
+    assert [r['ok'] for r in results] == [True, False]
+    assert '--passphrase is required' in results[1]['error']
+    assert mock_prompt.called is False
+    mock_repository().commit.assert_called_once_with(
+        message='Batch of 1 operations', paths=[db.filename('foo@example.com')])
+
+
+def test_batch_checks_passphrase_option_before_reading_operations(mocker, mock_config, irunner):
+    mocker.patch('passpie.cli.ensure_passphrase', side_effect=click.ClickException('Wrong'))
+    mock_add = mocker.patch('passpie.cli.batch_add')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['batch', '--passphrase', 'wrong'],
+                                input='{"op": "add", "fullname": "foo@example.com"}')
+
+    assert result.exit_code == 1
+    assert mock_add.called is False
+
+
+def test_get_prints_fullname_and_password_of_many_credentials(mocker, mock_config, creds, irunner):
+    credentials = creds.make(2)
+    mocker.patch('passpie.cli.Database.credentials_many', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mock_decrypt_many = mocker.patch('passpie.cli.decrypt_many', return_value=['p1', 'p2'])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['get', '--passphrase', 'passphrase'] +
+                                [c['fullname'] for c in credentials])
+
+    assert result.exit_code == 0
+    assert result.output.splitlines() == [
+        u'{}\tp1'.format(credentials[0]['fullname']),
+        u'{}\tp2'.format(credentials[1]['fullname']),
+    ]
+    assert mock_decrypt_many.call_count == 1
+
+
+def test_run_injects_passwords_in_command_environment(mocker, mock_config, creds, irunner):
+    credentials = creds.make(1)
+    mocker.patch('passpie.cli.Database.credentials_many', return_value=credentials[:1])
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.decrypt_many', return_value=['s3cr3t'])
+    mock_call = mocker.patch('subprocess.call', return_value=0)
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['run', '--env', 'SECRET=' + credentials[0]['fullname'],
+                                          '--passphrase', 'passphrase', '--', 'cmd', '--flag'])
+
+    assert result.exit_code == 0
+    args, kwargs = mock_call.call_args
+    assert args[0] == ['cmd', '--flag']
+    assert kwargs['env']['SECRET'] == 's3cr3t'
+
+
+def test_list_applies_offset_and_limit_to_streamed_credentials(mocker, mock_config, irunner):
+    credentials = [{'name': 'example.com', 'login': login, 'password': 'x', 'comment': ''}
+                   for login in ('a', 'b', 'c', 'd')]
+    mocker.patch('passpie.cli.Database.iter_credentials', return_value=iter(credentials))
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['list', '-f', 'tsv', '--offset', '1', '--limit', '2'])
+
+    assert result.exit_code == 0
+    assert [line.split('\t')[1] for line in result.output.splitlines()[1:]] == ['b', 'c']
+
+
+def test_search_fails_with_usage_error_on_invalid_query(mock_config, irunner):
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['search', 'modified:soon'])
+
+    assert result.exit_code == 2
+    assert 'Invalid modified value: soon' in result.output
+
+
+def test_search_hides_columns_with_configured_hidden_string(mocker, mock_config, irunner):
+    credentials = [{'name': 'example.com', 'login': 'foo', 'password': 'x', 'comment': ''}]
+    mocker.patch('passpie.cli.Database.find', return_value=credentials)
+
+    with mock_config({'hidden': ['password'], 'hidden_string': '#####'}):
+        result = irunner.invoke(cli.cli, ['search', '-f', 'tsv', 'foo'])
+
+    assert result.exit_code == 0
+    assert result.output.splitlines()[1].split('\t')[2] == '#####'
+
+
+def test_pick_copies_password_of_selected_credential(mocker, mock_config, creds, irunner):
+    credentials = creds.make(3)
+    mocker.patch('passpie.cli.Database.index',
+                 return_value=mocker.Mock(documents={i: c for i, c in enumerate(credentials)}))
+    mocker.patch('passpie.fuzzy.pick', side_effect=lambda finder, query: finder.items[1])
+    mocker.patch('passpie.cli.Database.credential', return_value=credentials[1])
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.decrypt', return_value='decrypted')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['pick', '--to', 'stdout'], input='passphrase\n')
+
+    assert result.exit_code == 0
+    assert result.output.splitlines()[-1] == 'decrypted'
+
+
+def test_pick_filter_prints_ranked_fullnames(mocker, mock_config, irunner):
+    credentials = [{'fullname': 'foo@example.com'}, {'fullname': 'bar@github.com', 'comment': 'gh'}]
+    mocker.patch('passpie.cli.Database.index',
+                 return_value=mocker.Mock(documents={i: c for i, c in enumerate(credentials)}))
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['pick', '--filter', 'gh'])
+
+    assert result.output.splitlines() == ['bar@github.com']
+
+
+def test_fingerprint_key_is_created_encrypted_only_by_committing_commands(mocker, tmpdir):
+    db = mocker.Mock(path=str(tmpdir), config={'recipient': 'r', 'homedir': 'h'},
+                     fingerprint_keys={})
+    mocker.patch('passpie.cli.encrypt', return_value='encrypted key')
+    mock_decrypt = mocker.patch('passpie.cli.decrypt')
+
+    assert cli.fingerprint_key(db) is None
+    assert tmpdir.join('.fingerprint').check() is False
+    key = cli.fingerprint_key(db, create=True)
+
+    assert tmpdir.join('.fingerprint').read() == 'encrypted key'
+    db.storage.written.add.assert_called_once_with(str(tmpdir.join('.fingerprint')))
+    assert cli.fingerprint_key(db) == key
+    assert mock_decrypt.called is False
+
+
+def test_fingerprint_key_is_decrypted_with_passphrase_and_kept_in_memory(mocker, tmpdir):
+    db = mocker.Mock(path=str(tmpdir), config={'recipient': 'r', 'homedir': 'h'},
+                     fingerprint_keys={})
+    other_db = mocker.Mock(path=str(tmpdir), config=db.config, fingerprint_keys={})
+    tmpdir.join('.fingerprint').write('encrypted key')
+    mock_decrypt = mocker.patch('passpie.cli.decrypt', return_value='key\n')
+
+    assert cli.fingerprint_key(db) is None
+    assert cli.fingerprint_key(db, passphrase='passphrase') == 'key'
+    assert cli.fingerprint_key(db) == 'key'
+    assert cli.fingerprint_key(other_db) is None
+    assert mock_decrypt.call_count == 1
+    assert tmpdir.listdir() == [tmpdir.join('.fingerprint')]
+
+
+def test_status_finds_repeated_passwords_from_fingerprints_without_decrypting(mocker, mock_config,
+                                                                               irunner):
+    from passpie import fingerprint
+    from datetime import datetime
+    key = fingerprint.generate_key()
+    credentials = [{'fullname': u'{}@example.com'.format(login), 'name': 'example.com',
+                    'login': login, 'password': 'encrypted', 'modified': datetime.now(),
+                    'fingerprint': fingerprint.make(key, 'same')}
+                   for login in ('foo', 'bar')]
+    mocker.patch('passpie.cli.Database.credentials', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=key)
+    mocker.patch('passpie.cli.read_status_cache',
+                 return_value={fingerprint.digest('encrypted'): {'score': 4}})
+    mocker.patch('passpie.cli.write_status_cache')
+    mock_decrypt_many = mocker.patch('passpie.cli.decrypt_many', return_value=[])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['status', '--passphrase', 'passphrase'])
+
+    assert result.exit_code == 0
+    assert "['bar@example.com']" in result.output
+    assert mock_decrypt_many.call_args[0][0] == []
+
+
+def test_status_decrypts_only_credentials_missing_from_status_cache(mocker, mock_config, irunner):
+    from passpie import fingerprint
+    from datetime import datetime
+    key = fingerprint.generate_key()
+    credentials = [{'fullname': u'{}@example.com'.format(login), 'name': 'example.com',
+                    'login': login, 'password': u'encrypted {}'.format(login),
+                    'modified': datetime.now()}
+                   for login in ('foo', 'bar')]
+    cache = {fingerprint.digest('encrypted foo'): {'fingerprint': fingerprint.make(key, 'same'),
+                                                   'score': 0}}
+    mocker.patch('passpie.cli.Database.credentials', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=key)
+    mocker.patch('passpie.cli.read_status_cache', return_value=cache)
+    mock_write_status_cache = mocker.patch('passpie.cli.write_status_cache')
+    mock_decrypt_many = mocker.patch('passpie.cli.decrypt_many', return_value=['same'])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['status', '--passphrase', 'passphrase'])
+
+    assert "['bar@example.com']" in result.output
+    assert mock_decrypt_many.call_args[0][0] == ['encrypted bar']
+    analysis = mock_write_status_cache.call_args[0][1]
+    assert sorted(analysis) == sorted(fingerprint.digest(c['password']) for c in credentials)
+    assert analysis[fingerprint.digest('encrypted bar')]['score'] == 0
+
+
+def test_status_flags_passwords_scoring_less_than_min_score(mocker, mock_config, irunner):
+    from datetime import datetime
+    credentials = [{'fullname': u'{}@example.com'.format(login), 'name': 'example.com',
+                    'login': login, 'password': u'encrypted {}'.format(login),
+                    'modified': datetime.now()}
+                   for login in ('foo', 'bar')]
+    mocker.patch('passpie.cli.Database.credentials', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=None)
+    mocker.patch('passpie.cli.decrypt_many', return_value=['password', 'x8#Kq!2vLz@9pW'])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['status', '--min-score', '3',
+                                          '--passphrase', 'passphrase'])
+
+    assert result.exit_code == 0
+    assert '0/4' in result.output
+    assert '4/4' not in result.output
+
+
+def test_status_with_similar_decrypts_all_credentials_to_find_variants(mocker, mock_config,
+                                                                        irunner):
+    from passpie import fingerprint
+    from datetime import datetime
+    key = fingerprint.generate_key()
+    credentials = [{'fullname': u'{}@example.com'.format(login), 'name': 'example.com',
+                    'login': login, 'password': u'encrypted {}'.format(login),
+                    'modified': datetime.now(), 'fingerprint': fingerprint.make(key, password)}
+                   for login, password in (('foo', 'Summer2023!'), ('bar', 'Summer2024!'))]
+    cache = {fingerprint.digest(c['password']): {'score': 4} for c in credentials}
+    mocker.patch('passpie.cli.Database.credentials', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=key)
+    mocker.patch('passpie.cli.read_status_cache', return_value=cache)
+    mocker.patch('passpie.cli.write_status_cache')
+    mock_decrypt_many = mocker.patch('passpie.cli.decrypt_many',
+                                     return_value=['Summer2023!', 'Summer2024!'])
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['status', '--similar', '--passphrase', 'passphrase'])
+
+    assert result.exit_code == 0
+    assert mock_decrypt_many.call_args[0][0] == ['encrypted foo', 'encrypted bar']
+    assert "['bar@example.com']" in result.output
+    assert "['foo@example.com']" in result.output
+
+
+def test_status_cache_is_written_encrypted_and_excluded_from_git(mocker, tmpdir):
+    db = mocker.Mock(path=str(tmpdir), config={'recipient': 'r', 'homedir': 'h'})
+    mocker.patch('passpie.cli.encrypt', side_effect=lambda data, **kwargs: data[::-1])
+    mocker.patch('passpie.cli.decrypt', side_effect=lambda data, **kwargs: data[::-1])
+
+    cli.write_status_cache(db, {'digest': {'fingerprint': 'fp'}})
+
+    assert 'fingerprint' not in tmpdir.join(cli.STATUS_CACHE_FILENAME).read()
+    db.repo.exclude.assert_called_once_with(cli.STATUS_CACHE_FILENAME)
+    assert cli.read_status_cache(db, 'passphrase') == {'digest': {'fingerprint': 'fp'}}
+
+
+def test_status_with_breached_counts_passwords_found_in_corpus(mocker, mock_config, irunner):
+    import hashlib
+    from datetime import datetime
+    credentials = [{'fullname': u'{}@example.com'.format(login), 'name': 'example.com',
+                    'login': login, 'password': u'encrypted {}'.format(login),
+                    'modified': datetime.now()}
+                   for login in ('foo', 'bar')]
+    mocker.patch('passpie.cli.Database.credentials', return_value=credentials)
+    mocker.patch('passpie.cli.ensure_passphrase')
+    mocker.patch('passpie.cli.fingerprint_key', return_value=None)
+    mocker.patch('passpie.cli.decrypt_many', return_value=['password', 'x8#Kq!2vLz@9pW'])
+
+    with mock_config():
+        with open('corpus.txt', 'w') as f:
+            f.write(u'{}:42\n'.format(hashlib.sha1(b'password').hexdigest().upper()))
+        result = irunner.invoke(cli.cli, ['status', '--breached', 'corpus.txt',
+                                          '--passphrase', 'passphrase'])
+
+    assert result.exit_code == 0
+    assert '42 times' in result.output
+
+
+def test_status_only_age_shows_old_credentials_without_passphrase(mocker, mock_config, irunner):
+    from datetime import datetime, timedelta
+    mock_find = mocker.patch('passpie.cli.Database.find', return_value=[
+        {'fullname': 'foo@example.com', 'modified': datetime.now() - timedelta(days=100)}])
+    mock_decrypt_many = mocker.patch('passpie.cli.decrypt_many')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['status', '--only-age', '--days', '90'])
+
+    assert result.exit_code == 0
+    assert 'foo@example.com' in result.output
+    assert '100 days ago' in result.output
+    assert 'Passphrase' not in result.output
+    mock_find.assert_called_once_with(u'modified:>90d')
+    assert mock_decrypt_many.called is False
+
+
+def test_list_older_than_finds_credentials_with_modified_index(mocker, mock_config, irunner):
+    mock_find = mocker.patch('passpie.cli.Database.find', return_value=[
+        {'name': 'example.com', 'login': 'foo', 'password': 'p', 'comment': ''}])
+    mock_iter_credentials = mocker.patch('passpie.cli.Database.iter_credentials')
+
+    with mock_config():
+        result = irunner.invoke(cli.cli, ['list', '--older-than', '30', '-f', 'jsonl'])
+
+    assert result.exit_code == 0
+    assert '"login": "foo"' in result.output
+    mock_find.assert_called_once_with(u'modified:>30d')
+    assert mock_iter_credentials.called is False
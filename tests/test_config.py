@@ -51,3 +51,23 @@ def path_is_repo_url(mocker):
     assert not is_repo_url(None)
     assert not is_repo_url('')
     assert not is_repo_url('++++++++++++++')
+
+
+def test_configuration_does_not_setup_crypt_for_metadata_keys(mocker):
+    mock_setup_crypt = mocker.patch('passpie.config.setup_crypt')
+    configuration = passpie.config.Configuration(path='path', headers=['name'])
+
+    assert configuration['path'] == 'path'
+    assert configuration.get('headers') == ['name']
+    assert mock_setup_crypt.called is False
+
+
+def test_configuration_setup_crypt_once_on_first_crypt_key_access(mocker):
+    values = {'path': 'path', 'homedir': '~/.gnupg', 'recipient': None}
+    resolved = dict(values, homedir='tempdir', recipient='FINGERPRINT')
+    mock_setup_crypt = mocker.patch('passpie.config.setup_crypt', return_value=resolved)
+    configuration = passpie.config.Configuration(values)
+
+    assert configuration['recipient'] == 'FINGERPRINT'
+    assert configuration.get('homedir') == 'tempdir'
+    mock_setup_crypt.assert_called_once_with(values)
@@ -1,6 +1,6 @@
 import pytest
 
-from passpie.credential import split_fullname, make_fullname
+from passpie.credential import split_fullname, split_fullnames, make_fullname
 
 
 def test_split_fullname_raises_value_error_when_invalid_name(mocker):
@@ -21,3 +21,18 @@ def test_make_fullname_returns_expected_fullname(mocker):
     assert make_fullname("foo", "bar") == "foo@bar"
     assert make_fullname("_", "bar") == "_@bar"
     assert make_fullname(None, "bar") == "@bar"
+
+
+def test_split_fullname_is_cached_per_fullname(mocker):
+    split_fullname.cache_clear()
+    split_fullname("foo@example.com")
+    split_fullname("foo@example.com")
+
+    assert split_fullname.cache_info().hits == 1
+
+
+def test_split_fullnames_splits_every_fullname_in_order():
+    assert split_fullnames(["foo@example.com", "example.com"]) == [
+        ("foo", "example.com"),
+        (None, "example.com"),
+    ]
@@ -12,6 +12,8 @@ from passpie.crypt import (
     export_secret_keys,
     import_keys,
     create_keys,
+    decrypt_many,
+    encrypt_many,
 )
 
 
@@ -218,3 +220,42 @@ def test_default_recipient_calls_expected_command_when_secret(mocker, mock_call)
 
     assert mock_call.called is True
     mock_call.assert_called_once_with(command)
+
+
+def test_decrypt_many_decrypts_all_items_keeping_order(mocker):
+    mock_decrypt = mocker.patch('passpie.crypt.decrypt', side_effect=lambda data, **kw: data.upper())
+    items = ['first', 'second', 'third']
+
+    result = decrypt_many(items, recipient='recipient', passphrase='passphrase', homedir='homedir')
+
+    assert result == ['FIRST', 'SECOND', 'THIRD']
+    mock_decrypt.assert_any_call('second', recipient='recipient',
+                                 passphrase='passphrase', homedir='homedir')
+
+
+def test_decrypt_many_returns_empty_list_without_items(mocker):
+    assert decrypt_many([], recipient='r', passphrase='p', homedir='h') == []
+
+
+def test_encrypt_many_resolves_default_recipient_once(mocker):
+    mock_get_default_recipient = mocker.patch('passpie.crypt.get_default_recipient',
+                                              return_value='default')
+    mock_encrypt = mocker.patch('passpie.crypt.encrypt', side_effect=lambda data, **kw: data[::-1])
+
+    result = encrypt_many(['first', 'second'], recipient=None, homedir='homedir')
+
+    assert result == ['tsrif', 'dnoces']
+    mock_get_default_recipient.assert_called_once_with('homedir')
+    mock_encrypt.assert_any_call('second', recipient='default', homedir='homedir')
+
+
+def test_decrypt_many_resolves_default_recipient_once(mocker):
+    mock_get_default_recipient = mocker.patch('passpie.crypt.get_default_recipient',
+                                              return_value='default')
+    mock_decrypt = mocker.patch('passpie.crypt.decrypt', side_effect=lambda data, **kw: data)
+
+    decrypt_many(['first', 'second'], recipient=None, passphrase='passphrase', homedir='homedir')
+
+    mock_get_default_recipient.assert_called_once_with('homedir')
+    mock_decrypt.assert_any_call('second', recipient='default',
+                                 passphrase='passphrase', homedir='homedir')
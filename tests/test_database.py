@@ -1,9 +1,15 @@
+import multiprocessing
 import os
+import subprocess
+
+import pytest
 
 from tinydb import where, Query
 from tinydb.storages import MemoryStorage
 
-from passpie.database import Database, PasspieStorage
+from passpie.database import Database, PasspieStorage, RevisionStorage
+from passpie.history import Repository
+from passpie.query import Index
 from .helpers import MockerTestCase
 
 
@@ -20,9 +26,9 @@ class StorageTests(MockerTestCase):
         mock_open().read.return_value = "{}"
         self.mock_os = self.patch('passpie.database.os')
         self.mock_os.walk.return_value = [
-            ('/foo', ('bar',), ('baz',)),
-            ('/foo/bar', (), ('eggs.pass',)),
-            ('/foo/bar2', (), ('spam.pass',))
+            ('/foo', ['bar'], ['baz']),
+            ('/foo/bar', [], ['eggs.pass']),
+            ('/foo/bar2', [], ['spam.pass'])
         ]
         storage = PasspieStorage("path")
         storage.write = self.Mock()
@@ -300,3 +306,311 @@ def test_database_filename_returns_expected_filename_of_credential(mocker):
     db = Database(config)
     assert db.filename("login@name") == os.path.normpath("path/name/login.pass")
     assert db.filename("@name") == os.path.normpath("path/name/.pass")
+
+
+def test_database_fetch_checkouts_credential_name_once_on_sparse_database(mocker):
+    config = {
+        'path': 'path',
+        'extension': '.pass',
+        'sparse': True,
+    }
+    mocker.patch('passpie.database.Repository')
+    db = Database(config)
+
+    db.fetch('example.com')
+    db.fetch('example.com')
+
+    db.repo.sparse_checkout.assert_called_once_with(['example.com'])
+
+
+def test_database_fetch_disables_sparse_checkout_when_no_name_passed(mocker):
+    config = {
+        'path': 'path',
+        'extension': '.pass',
+        'sparse': True,
+    }
+    mocker.patch('passpie.database.Repository')
+    db = Database(config)
+
+    db.fetch()
+    db.fetch('example.com')
+
+    db.repo.sparse_checkout.assert_called_once_with()
+    assert db.sparse is False
+
+
+def test_database_fetch_does_nothing_when_database_not_sparse(mocker):
+    config = {
+        'path': 'path',
+        'extension': '.pass',
+    }
+    mocker.patch('passpie.database.Repository')
+    db = Database(config)
+
+    db.fetch('example.com')
+
+    assert db.repo.sparse_checkout.called is False
+
+
+def test_revision_storage_reads_credentials_from_repository_tree(mocker):
+    mock_repository = mocker.patch('passpie.database.Repository')
+    mock_repository().read_tree.return_value = ['name: example.com\nlogin: foo\n']
+    storage = RevisionStorage('path', revision='HEAD~2')
+
+    elements = storage.read()
+
+    assert elements == {'_default': {1: {'name': 'example.com', 'login': 'foo'}}}
+    mock_repository().read_tree.assert_called_once_with('HEAD~2', storage.extension)
+
+
+def test_revision_storage_is_read_only(mocker):
+    storage = RevisionStorage('path', revision='HEAD~2')
+
+    with pytest.raises(IOError):
+        storage.write({'_default': {}})
+
+
+def test_database_uses_revision_storage_when_revision_configured(mocker):
+    config = {
+        'path': 'path',
+        'extension': '.pass',
+        'revision': 'HEAD~2',
+    }
+    mocker.patch('passpie.database.Repository')
+    db = Database(config)
+
+    assert isinstance(db._storage, RevisionStorage)
+    assert db._storage.revision == 'HEAD~2'
+
+
+def test_database_relpath_returns_credential_path_or_name_directory(mocker):
+    config = {
+        'path': 'path',
+        'extension': '.pass',
+    }
+    db = Database(config)
+    assert db.relpath("login@name") == os.path.normpath("name/login.pass")
+    assert db.relpath("name") == "name"
+
+
+def test_storage_write_merges_concurrent_writers_without_losing_updates(tmpdir):
+    path = str(tmpdir)
+    first, second = PasspieStorage(path), PasspieStorage(path)
+    first_data, second_data = first.read(), second.read()
+
+    first_data["_default"][1] = {"name": "example.com", "login": "foo"}
+    first.write(first_data)
+    second_data["_default"][1] = {"name": "example.com", "login": "bar"}
+    second.write(second_data)
+
+    credentials = PasspieStorage(path).read()["_default"].values()
+    assert sorted(c["login"] for c in credentials) == ["bar", "foo"]
+
+
+def add_credential(path, login):
+    db = Database({'path': path, 'extension': '.pass'})
+    db.add(u'{}@example.com'.format(login), 'password', '')
+
+
+def test_database_add_from_concurrent_processes_keeps_every_credential(tmpdir):
+    path = str(tmpdir)
+    Database({'path': path, 'extension': '.pass'}).add('first@example.com', 'password', '')
+    processes = [multiprocessing.Process(target=add_credential, args=(path, 'login{}'.format(i)))
+                 for i in range(8)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0] * 8
+    assert len(Database({'path': path, 'extension': '.pass'}).all()) == 9
+
+
+def add_and_commit_credential(path, login):
+    db = Database({'path': path, 'extension': '.pass'})
+    db.add(u'{}@example.com'.format(login), 'password', '')
+    db.commit(u'Added {}@example.com'.format(login))
+
+
+def test_database_commit_from_concurrent_processes_commits_only_own_credential(tmpdir):
+    path = str(tmpdir)
+    Repository(path).init()
+    for option, value in (('user.name', 'Passpie'), ('user.email', 'passpie@localhost')):
+        subprocess.check_call(['git', 'config', option, value], cwd=path)
+    db = Database({'path': path, 'extension': '.pass'})
+    db.add('first@example.com', 'password', '')
+    db.commit('Added first@example.com')
+    processes = [multiprocessing.Process(target=add_and_commit_credential,
+                                         args=(path, 'login{}'.format(i)))
+                 for i in range(12)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    output = subprocess.check_output(
+        ['git', 'log', '--pretty=format:%x00%s', '--name-only'], cwd=path).decode('utf-8')
+    commits = dict(entry.strip().split('\n', 1) for entry in output.split('\0') if entry)
+    assert [process.exitcode for process in processes] == [0] * 12
+    assert len(commits) == 13
+    for message, files in commits.items():
+        login = message.split()[1].split('@')[0]
+        assert files.split() == ['example.com/{}.pass'.format(login)]
+
+
+def test_database_add_after_remove_in_buffered_block(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    with db.buffered():
+        for login in ('foo', 'bar', 'spam'):
+            db.add(u'{}@example.com'.format(login), 'password', '')
+        db.remove('bar@example.com')
+        db.add('eggs@example.com', 'password', '')
+
+    assert sorted(c['login'] for c in db.all()) == ['eggs', 'foo', 'spam']
+
+
+def test_storage_write_only_rewrites_changed_credentials(mocker, tmpdir):
+    path = str(tmpdir)
+    storage = PasspieStorage(path)
+    storage.write({"_default": {1: {"name": "example.com", "login": "foo"},
+                                2: {"name": "example.com", "login": "bar"}}})
+    mock_mkdir_open = mocker.patch("passpie.database.mkdir_open")
+
+    data = storage.read()
+    data["_default"][1]["comment"] = "changed"
+    storage.write(data)
+
+    assert mock_mkdir_open.call_count == 1
+
+
+def test_storage_buffered_writes_to_disk_once_when_leaving_block(mocker, tmpdir):
+    storage = PasspieStorage(str(tmpdir))
+    mock_mkdir_open = mocker.patch("passpie.database.mkdir_open")
+
+    with storage.buffered():
+        for login in ("foo", "bar"):
+            data = storage.read()
+            data["_default"][len(data["_default"]) + 1] = {"name": "example.com", "login": login}
+            storage.write(data)
+        assert mock_mkdir_open.called is False
+
+    assert mock_mkdir_open.call_count == 2
+
+
+def test_storage_buffered_discards_changes_on_error(mocker, tmpdir):
+    storage = PasspieStorage(str(tmpdir))
+    mock_mkdir_open = mocker.patch("passpie.database.mkdir_open")
+
+    with pytest.raises(ValueError):
+        with storage.buffered():
+            storage.write({"_default": {1: {"name": "example.com", "login": "foo"}}})
+            raise ValueError()
+
+    assert mock_mkdir_open.called is False
+
+
+def test_storage_iter_credentials_yields_sorted_credentials_skipping_git_dir(tmpdir):
+    for dirname, filename, name in [('foo', 'b.pass', 'foo'), ('bar', 'a.pass', 'bar'),
+                                    ('.git', 'x.pass', 'git')]:
+        tmpdir.mkdir(dirname).join(filename).write('name: {}\n'.format(name))
+
+    names = [c['name'] for c in PasspieStorage(str(tmpdir)).iter_credentials()]
+
+    assert names == ['bar', 'foo']
+
+
+def test_database_iter_credentials_filters_by_regex_like_matches(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    credentials = [
+        {'name': 'example.com', 'login': 'foo', 'comment': ''},
+        {'name': 'other.com', 'login': 'example', 'comment': ''},
+        {'name': 'spam.com', 'login': 'eggs', 'comment': None},
+    ]
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    mocker.patch.object(db._storage, 'iter_credentials', return_value=iter(credentials))
+
+    result = list(db.iter_credentials('example'))
+
+    assert result == credentials[:2]
+
+
+def test_database_find_reuses_index_until_database_is_written(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    db.add('foo@example.com', 'password', '')
+    mock_index = mocker.patch('passpie.database.Index', wraps=Index)
+
+    assert [c['login'] for c in db.find('name:example.com')] == ['foo']
+    assert [c['login'] for c in db.find('login:foo')] == ['foo']
+    assert mock_index.call_count == 1
+
+    db.add('bar@example.com', 'password', '')
+    assert [c['login'] for c in db.find('name:example.com')] == ['bar', 'foo']
+    assert mock_index.call_count == 2
+
+    db.clear_cache()
+    db.find('name:example.com')
+    assert mock_index.call_count == 3
+
+
+def test_database_refresh_clears_cache_only_when_files_changed_on_disk(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    db.add('foo@example.com', 'password', '')
+    mock_clear_cache = mocker.patch.object(db, 'clear_cache')
+
+    db.refresh()
+    db.refresh()
+    assert mock_clear_cache.call_count == 1
+
+    tmpdir.join('example.com', 'foo.pass').write('name: example.com\nlogin: foo\n')
+    db.refresh()
+    assert mock_clear_cache.call_count == 2
+
+
+def test_database_refresh_checks_git_index_and_log_of_tracked_databases(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    tmpdir.mkdir('.git').join('index').write('index')
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    mock_clear_cache = mocker.patch.object(db, 'clear_cache')
+    mock_walk = mocker.patch('passpie.database.os.walk')
+
+    db.refresh()
+    db.refresh()
+    tmpdir.join('.git').mkdir('logs').join('HEAD').write('commit')
+    db.refresh()
+
+    assert mock_clear_cache.call_count == 2
+    assert mock_walk.called is False
+
+
+def test_database_credentials_many_returns_credentials_in_order_reading_once(mocker, tmpdir):
+    mocker.patch('passpie.database.Repository')
+    db = Database({'path': str(tmpdir), 'extension': '.pass'})
+    db.add('foo@example.com', 'password', '')
+    db.add('bar@example.com', 'password', '')
+    mock_read = mocker.spy(db.storage, 'read')
+
+    credentials = db.credentials_many(['bar@example.com', 'spam@example.com', 'example.com'])
+
+    assert credentials[0]['login'] == 'bar'
+    assert credentials[1] is None
+    assert mock_read.call_count == 1
+    assert credentials[2] == db.credential('example.com')
+
+
+def test_database_credentials_many_fetches_only_requested_names_on_sparse_database(mocker,
+                                                                                  tmpdir):
+    mock_repository = mocker.patch('passpie.database.Repository')
+    db = Database({'path': str(tmpdir), 'extension': '.pass', 'sparse': True})
+    db.add('foo@example.com', 'password', '')
+    db.add('bar@other.com', 'password', '')
+
+    credentials = db.credentials_many(['foo@example.com', 'spam@example.com'])
+
+    assert credentials[0]['login'] == 'foo'
+    assert credentials[1] is None
+    assert db.sparse is True
+    assert mock_repository().sparse_checkout.call_args_list == [
+        mocker.call(['example.com']), mocker.call(['other.com'])]
@@ -0,0 +1,17 @@
+from passpie import fingerprint
+
+
+def test_make_is_keyed_and_prefixed_with_key_id():
+    key, other_key = fingerprint.generate_key(), fingerprint.generate_key()
+
+    assert fingerprint.make(key, 's3cr3t') == fingerprint.make(key, 's3cr3t')
+    assert fingerprint.make(key, 's3cr3t') != fingerprint.make(other_key, 's3cr3t')
+    assert fingerprint.make(key, 's3cr3t').startswith(fingerprint.key_id(key) + '$')
+
+
+def test_is_valid_only_for_fingerprints_of_key():
+    key, other_key = fingerprint.generate_key(), fingerprint.generate_key()
+
+    assert fingerprint.is_valid(fingerprint.make(key, 's3cr3t'), key) is True
+    assert fingerprint.is_valid(fingerprint.make(other_key, 's3cr3t'), key) is False
+    assert fingerprint.is_valid(None, key) is False
@@ -0,0 +1,58 @@
+import pytest
+
+from passpie.fuzzy import Finder, pick, score
+
+
+def test_score_returns_none_when_query_is_not_a_subsequence():
+    assert score('gh', 'github.com') is not None
+    assert score('hg', 'github.com') is None
+    assert score('', 'anything') == 0
+
+
+def test_score_prefers_boundaries_consecutive_and_short_gaps():
+    assert score('gh', 'git@hub') > score('gh', 'gxxhxx')
+    assert score('git', 'github') > score('git', 'gxixtx')
+    assert score('gh', 'GitHub') > score('gh', 'github')
+
+
+def test_finder_ranks_best_matches_first():
+    items = ['foo@example.com', 'foo@github.com', 'gh@example.com']
+    finder = Finder(items, key=lambda item: item)
+
+    assert finder.search('gh')[0] == 'gh@example.com'
+    assert finder.search('fgit') == ['foo@github.com']
+    assert finder.search('fo', limit=1) == ['foo@github.com']
+    assert finder.search('') == ['foo@github.com', 'gh@example.com', 'foo@example.com']
+
+
+def test_finder_filters_previous_matches_when_query_is_extended(mocker):
+    finder = Finder(['abc', 'abd', 'xyz'], key=lambda item: item)
+    assert finder.matching('ab') == [0, 1]
+
+    finder.lowered[2] = 'abd'
+    assert finder.matching('abd') == [1]
+    assert finder.matching('x') == []
+    assert 'ab' not in finder.matches
+
+
+def test_pick_narrows_on_keystrokes_and_returns_selected_item(mocker):
+    mocker.patch('passpie.fuzzy.click.echo')
+    finder = Finder(['foo@example.com', 'bar@example.com', 'baz@example.com'], key=lambda i: i)
+    keys = iter(['b', 'a', '\x1b[B', '\r'])
+
+    selected = pick(finder, getchar=lambda: next(keys))
+
+    assert selected == 'baz@example.com'
+
+
+@pytest.mark.parametrize('key', ['\x1b', '', KeyboardInterrupt])
+def test_pick_returns_none_when_cancelled(mocker, key):
+    mocker.patch('passpie.fuzzy.click.echo')
+    finder = Finder(['foo@example.com'], key=lambda i: i)
+
+    def getchar():
+        if key is KeyboardInterrupt:
+            raise KeyboardInterrupt
+        return key
+
+    assert pick(finder, getchar=getchar) is None
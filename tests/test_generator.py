@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from passpie import generator
+
+
+@pytest.mark.parametrize('pattern', [
+    r'[a-z]{10} [-_+=*&%$#]{10} [A-Z]{10}',
+    r'[\w]{32}',
+    r'(\w{4}-){3}\w{4}',
+    r'(foo|bar)\d{2,4}[^a-z]',
+    r'.{8,12}',
+])
+def test_generate_matches_pattern(pattern):
+    gen = generator.compile(pattern)
+    for password in gen.generate_many(50):
+        assert re.match(r'^(?:{})$'.format(pattern), password)
+
+
+def test_entropy_of_pattern():
+    assert generator.compile(r'[a-z]{10}').entropy == pytest.approx(10 * 4.7004, rel=1e-3)
+    assert generator.compile(r'\d{2,3}').entropy == pytest.approx(1 + 2.5 * 3.3219, rel=1e-3)
+    assert generator.compile(r'(ab|[cd])').entropy == pytest.approx(1.5)
+    assert generator.compile(r'literal').entropy == 0
+
+
+def test_compile_parses_pattern_once(mocker):
+    spy = mocker.spy(generator.sre_parse, 'parse')
+    generator.compile.cache_clear()
+
+    generator.compile(r'[0-9]{6}').generate()
+    generator.compile(r'[0-9]{6}').generate()
+
+    assert spy.call_count == 1
+
+
+def test_compile_raises_value_error_on_invalid_and_unsupported_patterns():
+    with pytest.raises(ValueError):
+        generator.compile(r'[a-z')
+    with pytest.raises(generator.UnsupportedPattern):
+        generator.compile(r'(a)\1')
+
+
+def test_random_bytes_reads_batches_without_bias(mocker):
+    mock_urandom = mocker.patch('passpie.generator.os.urandom',
+                                side_effect=lambda n: bytes(bytearray([255, 1, 2] * n))[:n])
+    random = generator.RandomBytes(size=8)
+
+    assert random.below(10) == 1
+    assert random.choices('abc', 4) == ['c', 'b', 'c', 'b']
+    assert mock_urandom.call_count == 1
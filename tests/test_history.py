@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from passpie.history import ensure_git, Repository, clone
 
@@ -86,6 +88,31 @@ def test_git_clone_calls_expected_command_with_repository_url_and_depth(mocker,
     mock_process.call.assert_called_once_with(cmd)
 
 
+def test_git_clone_calls_expected_command_with_partial_clone_options(mocker, mock_process):
+    url = 'https://foo@example.com/user/repo.git'
+    dest = "some/path"
+    cmd = ['git', 'clone', url, dest, '--filter=blob:none', '--sparse']
+    clone(url, dest, partial=True)
+
+    mock_process.call.assert_called_once_with(cmd)
+
+
+def test_git_sparse_checkout_adds_directories_to_checkout(mocker, mock_process):
+    cmd = ['git', 'sparse-checkout', 'add', 'example.com', 'example.org']
+    repo = Repository('path')
+    repo.sparse_checkout(['example.com', 'example.org'])
+
+    mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
+
+
+def test_git_sparse_checkout_disable_when_no_directories_passed(mocker, mock_process):
+    cmd = ['git', 'sparse-checkout', 'disable']
+    repo = Repository('path')
+    repo.sparse_checkout()
+
+    mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
+
+
 def test_git_push_calls_expected_command(mocker, mock_process):
     cmd = ['git', 'push', 'origin', 'master']
     repo = Repository('path')
@@ -118,17 +145,6 @@ def test_git_add_has_call_with_expected_command_with_all_flag_when_all_is_true(m
     mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
 
 
-def test_git_sha_list_has_call_with_expected_command(mocker, mock_process):
-    output = 'a\nb'
-    mock_process.call.return_value = (output, '')
-    cmd = ['git', 'log', '--reverse', '--pretty=format:%h']
-    repo = Repository('path')
-    result = repo.sha_list()
-
-    assert result == output.splitlines()
-    mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
-
-
 def test_git_commit_creates_commit_with_message(mocker, mock_process):
     message = 'Initial commit'
     repo = Repository('path')
@@ -141,6 +157,21 @@ def test_git_commit_creates_commit_with_message(mocker, mock_process):
     mock_process.call.assert_any_call(cmd, cwd=repo.path)
 
 
+def test_git_commit_with_paths_stages_and_commits_only_those_paths(mocker, mock_process):
+    mocker.patch('passpie.history.os.path.exists', return_value=True)
+    message = 'Added foo@example.com'
+    repo = Repository('path')
+    mocker.patch.object(repo, 'add')
+
+    repo.commit(message, paths=[os.path.join('path', 'example.com', 'foo.pass')])
+
+    assert repo.add.called is False
+    filename = os.path.join('example.com', 'foo.pass')
+    mock_process.call.assert_any_call(['git', 'add', '--all', '--', filename], cwd=repo.path)
+    mock_process.call.assert_any_call(['git', 'commit', '--author={}'.format(repo.author),
+                                       '-m', message, '--', filename], cwd=repo.path)
+
+
 def test_git_commit_calls_push_when_autopush_set(mocker, mock_process):
     message = 'Initial commit'
     cmd = ['git', 'commit', '-m', message]
@@ -151,42 +182,134 @@ def test_git_commit_calls_push_when_autopush_set(mocker, mock_process):
     assert repo.push.called
 
 
-def test_git_commit_list_has_expected_commit_list(mocker, mock_process):
-    commit_list = [
-        'another commit',
-        'initial commit'
+def test_git_commit_runs_auto_gc_when_autogc_set(mocker, mock_process):
+    repo = Repository('path', autogc=500)
+    mocker.patch.object(repo, 'gc')
+
+    repo.commit('Initial commit')
+    repo.gc.assert_called_once_with(auto=True)
+
+
+def test_git_gc_auto_uses_autogc_threshold(mocker, mock_process):
+    cmd = ['git', '-c', 'gc.auto=500', '-c', 'gc.autoDetach=true', 'gc', '--auto', '--quiet']
+    repo = Repository('path', autogc=500)
+    repo.gc(auto=True)
+
+    mock_process.call.assert_called_once_with(cmd, cwd=repo.path,
+                                              stdout=mock_process.DEVNULL)
+
+
+def test_git_count_objects_returns_dict_of_integers(mocker, mock_process):
+    output = "count: 12\nsize: 48\nin-pack: 3\npacks: 1\nsize-pack: 2\n"
+    mock_process.call.return_value = (output, '')
+    repo = Repository('path')
+
+    stats = repo.count_objects()
+
+    assert stats == {'count': 12, 'size': 48, 'in-pack': 3, 'packs': 1, 'size-pack': 2}
+    mock_process.call.assert_called_once_with(['git', 'count-objects', '-v'], cwd=repo.path)
+
+
+def test_git_count_returns_number_of_commits(mocker, mock_process):
+    mock_process.call.return_value = ('3\n', '')
+    cmd = ['git', 'rev-list', '--count', '--first-parent', 'HEAD']
+    repo = Repository('path')
+
+    assert repo.count() == 3
+    mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
+
+
+def test_git_log_yields_index_sha_date_and_message_numbered_from_count(mocker, mock_process):
+    output = "c3\x1f2016-01-03 10:00\x1fthird\nb2\x1f2016-01-02 10:00\x1fsecond"
+    mock_process.call.side_effect = [('2\n', ''), (output, '')]
+    repo = Repository('path')
+
+    result = list(repo.log())
+
+    assert result == [
+        (1, 'c3', '2016-01-03 10:00', 'third'),
+        (0, 'b2', '2016-01-02 10:00', 'second'),
     ]
-    mock_process.call.return_value = ("\n".join(commit_list), 'no error')
-    cmd = ['git', 'log', '--reverse', '--pretty=format:%s']
+    cmd, = mock_process.call.call_args[0]
+    assert '--skip=0' in cmd
+    assert not any(arg.startswith('--max-count') for arg in cmd)
+
+
+def test_git_log_with_limit_and_offset_lists_only_the_page_in_git(mocker, mock_process):
+    output = "c6\x1f2016-01-06 10:00\x1fcommit 6\nc5\x1f2016-01-05 10:00\x1fcommit 5"
+    mock_process.call.side_effect = [('10\n', ''), (output, '')]
     repo = Repository('path')
-    commits = repo.commit_list()
 
-    assert len(repo.commit_list()) == len(commits)
-    mock_process.call.assert_any_call(cmd, cwd=repo.path)
+    result = list(repo.log(limit=2, offset=3))
+
+    assert result == [(6, 'c6', '2016-01-06 10:00', 'commit 6'),
+                      (5, 'c5', '2016-01-05 10:00', 'commit 5')]
+    cmd, = mock_process.call.call_args[0]
+    assert cmd[:5] == ['git', 'log', '--first-parent', '--skip=3', '--max-count=2']
+
+
+def test_git_history_limits_log_to_credential_path(mocker, mock_process):
+    output = "c3\x1f2016-01-03 10:00\x1fUpdated foo@example.com"
+    mock_process.call.return_value = (output, '')
+    repo = Repository('path')
+
+    result = list(repo.history('example.com/foo.pass', follow=True))
+
+    assert result == [('c3', '2016-01-03 10:00', 'Updated foo@example.com')]
+    cmd, = mock_process.call.call_args[0]
+    assert '--follow' in cmd
+    assert cmd[-2:] == ['--', 'example.com/foo.pass']
+
+
+def test_git_read_tree_returns_blob_contents_at_revision(mocker, mock_process):
+    ls_tree = ("100644 blob aaa\t.config\0"
+               "100644 blob bbb\texample.com/foo.pass\0"
+               "100644 blob ccc\texample.com/bar.pass\0")
+    cat_file = (u"bbb blob 6\nfoo: 1\n"
+                u"ccc blob 8\nbar: \u00e9\n\n")
+    mock_process.call.side_effect = [(ls_tree, ''), (cat_file, '')]
+    repo = Repository('path')
+
+    contents = repo.read_tree('HEAD~1', '.pass')
+
+    assert contents == ['foo: 1', u'bar: \u00e9\n']
+    mock_process.call.assert_any_call(['git', 'ls-tree', '-r', '-z', 'HEAD~1'], cwd=repo.path)
+    mock_process.call.assert_called_with(['git', 'cat-file', '--batch'],
+                                         cwd=repo.path, input='bbb\nccc\n')
 
 
 def test_reset_doesnt_call_git_reset_hard_on_commit_when_not_found(mocker, mock_process):
-    sha_list = []
     index = 0
 
     repo = Repository('path')
-    mocker.patch.object(repo, 'sha_list', return_value=sha_list)
+    mocker.patch.object(repo, 'count', return_value=0)
     repo.reset(index)
 
-    mock_process.call.called is False
+    assert mock_process.call.called is False
 
 
 def test_reset_call_git_reset_hard_on_commit_when_found(mocker, mock_process):
-    sha_list = [
-        'd6b52b5',
-        '34c5439',
-        '5910c2b',
-    ]
     index = 0
-    cmd = ['git', 'reset', '--hard', sha_list[index]]
+    cmd = ['git', 'reset', '--hard', 'HEAD~2']
 
     repo = Repository('path')
-    mocker.patch.object(repo, 'sha_list', return_value=sha_list)
+    mocker.patch.object(repo, 'count', return_value=3)
     repo.reset(index)
 
     mock_process.call.assert_called_once_with(cmd, cwd=repo.path)
+
+
+def test_exclude_adds_pattern_to_git_info_exclude_once(tmpdir):
+    tmpdir.mkdir('.git')
+    repo = Repository(str(tmpdir))
+
+    repo.exclude('.status_cache')
+    repo.exclude('.status_cache')
+
+    assert tmpdir.join('.git', 'info', 'exclude').read() == '.status_cache\n'
+
+
+def test_exclude_does_nothing_without_git_directory(tmpdir):
+    Repository(str(tmpdir)).exclude('.status_cache')
+
+    assert tmpdir.listdir() == []
@@ -33,22 +33,17 @@ class FakeKeepassImporterClass(BaseImporter):
     pass
 """)
 
-    import pkg_resources
-    fake_ep = pkg_resources.EntryPoint(
-        'fake_keepass', 'fake_module',
-        attrs=('FakeKeepassImporterClass', ))
-    mock_iter_entry_points = mocker.patch(
-        'pkg_resources.iter_entry_points',
-        return_value=iter([fake_ep, ]))
+    from importlib.metadata import EntryPoint
+    fake_ep = EntryPoint(name='fake_keepass',
+                         value='fake_module:FakeKeepassImporterClass',
+                         group='passpie_importers')
+    mocker.patch.dict(importers._registry, clear=True)
+    mocker.patch('importlib.metadata.entry_points',
+                 return_value=mocker.Mock(select=lambda group: [fake_ep]))
 
     try:
-        target_klass = None
-        for klass in importers._get_importers_from_entry_points():
-            if klass.__name__ == 'FakeKeepassImporterClass':
-                target_klass = klass
-                break
-
-        mock_iter_entry_points.assert_called_once_with('passpie_importers')
+        assert 'fake_keepass' in importers.get_names()
+        target_klass = type(importers.get('fake_keepass'))
 
         assert target_klass.__name__ == 'FakeKeepassImporterClass'
         assert target_klass.__module__ == 'fake_module'
@@ -58,17 +53,36 @@ class FakeKeepassImporterClass(BaseImporter):
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
-def test_get_all_yields_importers_from_entry_points(mocker):
+def test_get_all_yields_importers_from_registry(mocker):
     from passpie import importers
 
     class FakeImporter(importers.BaseImporter):
         pass
     fake_importers = {FakeImporter, }
 
-    mocker.patch.object(importers, '__all__', new=[])
-    mock_ep_finder = mocker.patch.object(
-        importers, '_get_importers_from_entry_points',
-        return_value=iter(fake_importers))
+    mocker.patch.object(importers, 'registry', return_value={'fake': 'fake_module:FakeImporter'})
+    mocker.patch.object(importers, 'load', return_value=FakeImporter)
 
     found_importers = set(importers.get_all())
     assert found_importers == fake_importers
+
+
+def test_get_names_does_not_import_importer_modules(mocker):
+    from passpie import importers
+
+    mocker.patch.dict(importers._registry, clear=True)
+    mocker.patch.object(importers, '_iter_entry_points', return_value=iter([]))
+    mock_import_module = mocker.patch('passpie.importers.importlib.import_module')
+
+    names = importers.get_names()
+
+    assert names == sorted(importers.BUILTIN_IMPORTERS)
+    assert mock_import_module.called is False
+
+
+def test_load_returns_none_when_reference_is_not_an_importer(mocker):
+    from passpie import importers
+
+    assert importers.load('passpie.importers:BaseImporter') is None
+    assert importers.load('passpie.importers:NotFound') is None
+    assert importers.load('not_a_module:NotFound') is None
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+from tinydb.table import Document
+
+from passpie.query import Index, Predicate, QueryError, parse
+
+
+NOW = datetime(2016, 6, 1)
+
+
+@pytest.fixture
+def documents():
+    credentials = [
+        {'name': 'github.com', 'login': 'ci-deploy', 'comment': 'prod', 'modified': datetime(2016, 5, 30)},
+        {'name': 'github.com', 'login': 'foo', 'comment': '', 'modified': datetime(2015, 1, 1)},
+        {'name': 'example.com', 'login': 'ci-test', 'comment': 'prod', 'modified': datetime(2016, 1, 1)},
+        {'name': 'example.com', 'login': 'bar', 'comment': None, 'modified': None},
+    ]
+    return [Document(c, doc_id=i) for i, c in enumerate(credentials, start=1)]
+
+
+def logins(credentials):
+    return sorted(c['login'] for c in credentials)
+
+
+def test_parse_splits_fields_regex_and_quoted_values():
+    predicates = parse('name:github.com login:~^ci- comment:"prod db" foo', now=NOW)
+
+    assert predicates[0] == Predicate('name', '=', 'github.com')
+    assert predicates[1].field == 'login' and predicates[1].op == '~'
+    assert predicates[2] == Predicate('comment', '=', 'prod db')
+    assert predicates[3].field is None and predicates[3].value.pattern == 'foo'
+
+
+def test_parse_keeps_backslashes_and_spaces_in_regular_expressions():
+    assert parse(r'^\w+$')[0].value.pattern == r'^\w+$'
+    assert parse(r'ci-\d deploy')[0].value.pattern == r'ci-\d deploy'
+    predicates = parse(r'login:~^\w+-\d "prod \w+" comment:\.')
+    assert predicates[0].value.pattern == r'^\w+-\d'
+    assert predicates[1].value.pattern == r'prod \w+'
+    assert predicates[2] == Predicate('comment', '=', r'\.')
+
+
+def test_parse_modified_durations_compare_age_and_dates_compare_dates():
+    assert parse('modified:<90d', now=NOW) == [Predicate('modified', '>', datetime(2016, 3, 3))]
+    assert parse('modified:>=2w', now=NOW) == [Predicate('modified', '<=', datetime(2016, 5, 18))]
+    assert parse('modified:<2016-01-01') == [Predicate('modified', '<', datetime(2016, 1, 1))]
+    assert parse('modified:2016-01-01') == [Predicate('modified', '>=', datetime(2016, 1, 1)),
+                                            Predicate('modified', '<', datetime(2016, 1, 2))]
+
+
+def test_parse_keeps_unknown_fields_and_unbalanced_quotes_as_regex():
+    assert parse('foo:bar')[0].value.pattern == 'foo:bar'
+    assert parse('"foo')[0].value.pattern == '"foo'
+
+
+@pytest.mark.parametrize('text', ['modified:soon', 'modified:=90d', 'login:~(', '[a-'])
+def test_parse_raises_query_error_on_invalid_terms(text):
+    with pytest.raises(QueryError):
+        parse(text)
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('name:github.com', ['ci-deploy', 'foo']),
+    ('name:github.com login:foo', ['foo']),
+    ('login:~^ci-', ['ci-deploy', 'ci-test']),
+    ('comment:prod modified:<90d', ['ci-deploy']),
+    ('modified:>90d', ['ci-test', 'foo']),
+    ('modified:2016-01-01', ['ci-test']),
+    ('name:nothing.com login:~.', []),
+    ('ba', ['bar']),
+])
+def test_index_execute_returns_credentials_matching_all_predicates(documents, text, expected):
+    index = Index(documents)
+
+    assert logins(index.execute(parse(text, now=NOW))) == expected
+
+
+def test_index_execute_only_scans_candidates_of_indexed_predicates(mocker, documents):
+    index = Index(documents)
+    predicate = Predicate('login', '~', mocker.Mock())
+    predicate.value.search.return_value = True
+
+    result = index.execute([Predicate('name', '=', 'example.com'), predicate])
+
+    assert logins(result) == ['bar', 'ci-test']
+    assert predicate.value.search.call_count == 2
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import pytest
+
+from passpie import server
+
+
+@pytest.fixture
+def socket_path(tmpdir):
+    dirname = tmpdir.mkdir('socket')
+    dirname.chmod(0o700)
+    return str(dirname.join('passpie.sock'))
+
+
+@pytest.fixture
+def running_server(socket_path):
+    calls = []
+
+    def invoke(args, env=None, cwd=None, color=False):
+        calls.append(args)
+        return u'output of {}\n'.format(' '.join(args)), 0
+
+    instance = server.Server(socket_path, invoke)
+    thread = threading.Thread(target=instance.serve_forever)
+    thread.daemon = True
+    thread.start()
+    instance.calls = calls
+    yield instance
+    instance.shutdown()
+    instance.server_close()
+
+
+def test_dispatch_returns_method_not_found_error_for_unknown_method(mocker):
+    instance = mocker.Mock(invoke=mocker.Mock())
+    message = server.Server.dispatch(instance, {'id': 3, 'method': 'unknown'})
+
+    assert message == {'jsonrpc': '2.0', 'id': 3,
+                       'error': {'code': -32601, 'message': 'Method not found'}}
+
+
+def test_dispatch_invoke_returns_output_and_exit_code(mocker):
+    instance = mocker.Mock(invoke=mocker.Mock(return_value=('output', 1)))
+    request = {'id': 1, 'method': 'invoke', 'params': {'args': ['list']}}
+    message = server.Server.dispatch(instance, request)
+
+    instance.invoke.assert_called_once_with(args=['list'])
+    assert message['result'] == {'output': 'output', 'exit_code': 1}
+
+
+def test_server_socket_is_only_accessible_by_user(running_server, socket_path):
+    assert os.stat(socket_path).st_mode & 0o077 == 0
+
+
+def test_server_refuses_socket_directory_accessible_by_others(tmpdir):
+    dirname = tmpdir.mkdir('shared')
+    dirname.chmod(0o777)
+    with pytest.raises(OSError):
+        server.Server(str(dirname.join('passpie.sock')), invoke=None)
+
+
+def test_call_sends_request_to_running_server(running_server, socket_path):
+    assert server.call('ping', path=socket_path) == 'pong'
+    result = server.call('invoke', {'args': ['list']}, path=socket_path)
+
+    assert result == {'output': 'output of list\n', 'exit_code': 0}
+    assert running_server.calls == [['list']]
+
+
+def test_call_returns_none_when_server_not_running(socket_path):
+    assert server.call('ping', path=socket_path) is None
+
+
+@pytest.mark.parametrize('args,expected', [
+    (['list'], 'list'),
+    (['-D', 'path', 'run', '--', 'ls'], 'run'),
+    (['--database=path', '-vv', 'pick'], 'pick'),
+    (['--config', 'passpie.yml', '--at', 'HEAD', 'copy', 'foo'], 'copy'),
+    (['-v'], None),
+])
+def test_subcommand_skips_global_options(args, expected):
+    assert server.subcommand(args) == expected
+
+
+def test_main_forwards_command_to_running_server(mocker, capsys):
+    mocker.patch('passpie.server.call', return_value={'output': 'forwarded\n', 'exit_code': 3})
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    with pytest.raises(SystemExit) as excinfo:
+        server.main(['list'])
+
+    assert excinfo.value.code == 3
+    assert capsys.readouterr().out == 'forwarded\n'
+    assert mock_cli.called is False
+
+
+def test_main_runs_command_locally_when_server_not_running(mocker):
+    mocker.patch('passpie.server.call', return_value=None)
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    server.main(['list'])
+
+    mock_cli.assert_called_once_with(['list'])
+
+
+def test_main_runs_local_commands_without_server(mocker):
+    mock_call = mocker.patch('passpie.server.call')
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    server.main(['serve'])
+
+    assert mock_call.called is False
+    mock_cli.assert_called_once_with(['serve'])
+
+
+@pytest.mark.parametrize('args', [['-D', 'path', 'run', 'ls'], ['-v', 'pick']])
+def test_main_runs_local_commands_after_global_options_without_server(mocker, args):
+    mock_call = mocker.patch('passpie.server.call')
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    server.main(args)
+
+    assert mock_call.called is False
+    mock_cli.assert_called_once_with(args)
+
+
+@pytest.mark.parametrize('args', [
+    ['add', 'foo@example.com', '-i'],
+    ['update', '--interactive', '--name', 'bar', 'foo@example.com'],
+    ['add', '-ri', 'foo@example.com'],
+])
+def test_main_runs_interactive_commands_without_server(mocker, args):
+    mock_call = mocker.patch('passpie.server.call')
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    server.main(args)
+
+    assert mock_call.called is False
+    mock_cli.assert_called_once_with(args)
+
+
+@pytest.mark.parametrize('result', [
+    {'output': 'Passphrase: \nAborted!\n', 'exit_code': 1},
+    {'output': '', 'exit_code': None},
+])
+def test_main_runs_command_locally_when_server_cannot_run_it(mocker, result):
+    mocker.patch('passpie.server.call', return_value=result)
+    mock_cli = mocker.patch('passpie.cli.cli')
+
+    server.main(['copy', 'foo@example.com'])
+
+    mock_cli.assert_called_once_with(['copy', 'foo@example.com'])
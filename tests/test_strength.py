@@ -0,0 +1,49 @@
+from passpie import strength
+
+
+def test_estimate_finds_common_passwords_with_case_and_l33t_variations():
+    for password in ('password', 'P@ssw0rd', 'qwerty', 'iloveyou'):
+        result = strength.estimate(password)
+        assert result.score == 0
+        assert [m.pattern for m in result.sequence] == ['dictionary']
+
+
+def test_estimate_detects_keyboard_patterns():
+    result = strength.estimate('zxcvfr')
+    assert [m.pattern for m in result.sequence] == ['keyboard']
+    assert result.score < 2
+
+
+def test_estimate_detects_sequences_repeats_and_dates():
+    assert [m.pattern for m in strength.estimate('lmnopq').sequence] == ['sequence']
+    assert [m.pattern for m in strength.estimate('kkkkkkkk').sequence] == ['repeat']
+    assert [m.pattern for m in strength.estimate('12/05/1990').sequence] == ['date']
+    assert [m.pattern for m in strength.estimate('19900512').sequence] == ['date']
+
+
+def test_estimate_scores_random_passwords_as_strong():
+    result = strength.estimate('x8#Kq!2vLz@9pW')
+    assert result.score == 4
+    assert result.entropy > 40
+
+
+def test_estimate_handles_empty_and_long_passwords():
+    assert strength.estimate('').score == 0
+    assert strength.estimate('a' * 300).guesses < strength.estimate('x8#Kq!2vLz@9pW' * 20).guesses
+
+
+def test_trie_finds_every_word_starting_at_position():
+    trie = strength.Trie({'pass': 2, 'password': 1})
+    assert list(trie.find('passwords', 0)) == [(4, 2), (8, 1)]
+    assert list(trie.find('passwords', 1)) == []
+
+
+def test_score_many_uses_worker_processes_for_large_lists(mocker):
+    mocker.patch('passpie.strength.PARALLEL_MIN_PASSWORDS', 2)
+    mock_executor = mocker.patch('concurrent.futures.ProcessPoolExecutor')
+    mock_executor().__enter__().map.return_value = iter([0, 4])
+
+    assert strength.score_many(['password', 'x8#Kq!2vLz@9pW']) == [0, 4]
+    assert strength.score_many(['password'], workers=1) == [0]
+    mock_executor().__enter__().map.assert_called_once_with(
+        strength.score, ['password', 'x8#Kq!2vLz@9pW'], chunksize=64)
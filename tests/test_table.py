@@ -1,3 +1,8 @@
+import json
+from datetime import datetime
+
+import pytest
+
 from passpie.table import Table
 
 
@@ -12,7 +17,7 @@ def test_table_colorile_calls_click_style_with_key_on_text(mocker):
 def test_render_hide_with_starts_hidden_columns(mocker):
     table = Table(headers=['password'], hidden=['password'])
     mocker.patch('passpie.table.click.style', return_value='password')
-    mock_tabulate = mocker.patch('passpie.table.tabulate')
+    mock_tabulate = mocker.patch('tabulate.tabulate')
     data = [{'password': 's3cr3t'}, {'password': 'another, s3cr3t'}]
 
     table.render(data)
@@ -28,7 +33,7 @@ def test_render_hide_with_starts_hidden_columns(mocker):
 def test_render_colorize_expected_columns(mocker):
     colors = {'name': 'red', 'login': 'blue'}
     table = Table(headers=['name', 'login'], colors=colors)
-    mock_tabulate = mocker.patch('passpie.table.tabulate')
+    mock_tabulate = mocker.patch('tabulate.tabulate')
     mocker.patch.object(table, 'colorize', return_value='colorized')
     mocker.patch('passpie.table.click.style', return_value='header')
     data = [{'login': 'foo', 'name': 'example.com'}]
@@ -46,3 +51,77 @@ def test_render_colorize_expected_columns(mocker):
                                           tablefmt=table.table_format,
                                           missingval=table.missing,
                                           numalign='left')
+
+
+def test_stream_jsonl_yields_one_object_per_entry_with_hidden_columns():
+    table = Table(headers=['name', 'password'], hidden=['password'])
+    data = iter([{'name': 'foo', 'password': 's3cr3t'}, {'name': 'bar'}])
+
+    lines = list(table.stream(data, 'jsonl'))
+
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {'name': 'foo', 'password': '*****'}
+    assert json.loads(lines[1]) == {'name': 'bar', 'password': '*****'}
+
+
+def test_stream_json_yields_a_valid_json_list():
+    table = Table(headers=['name', 'modified'])
+    data = [{'name': 'foo', 'modified': datetime(2016, 1, 1)}, {'name': 'bar'}]
+
+    lines = list(table.stream(data, 'json'))
+
+    assert json.loads('\n'.join(lines)) == [
+        {'name': 'foo', 'modified': '2016-01-01 00:00:00'},
+        {'name': 'bar', 'modified': None},
+    ]
+    assert json.loads('\n'.join(table.stream([], 'json'))) == []
+
+
+def test_stream_tsv_yields_header_and_escaped_values_without_styling(mocker):
+    mock_style = mocker.patch('passpie.table.click.style')
+    table = Table(headers=['name', 'comment'])
+    data = [{'name': 'foo', 'comment': 'tab\there\nnewline'}]
+
+    lines = list(table.stream(data, 'tsv'))
+
+    assert lines == ['name\tcomment', 'foo\ttab\\there\\nnewline']
+    assert mock_style.called is False
+
+
+@pytest.mark.parametrize('table_format', ['rst', 'fancy_grid', 'simple', 'github', 'psql', 'html'])
+def test_render_rows_yields_same_lines_as_render_on_sorted_data(table_format):
+    table = Table(headers=['name', 'login', 'password'], table_format=table_format,
+                  hidden=['password'], colors={'name': 'red'})
+    data = [{'name': 'a.com', 'login': 'verylonglogin', 'password': 's3cr3t'},
+            {'name': 'example.com', 'login': 'foo', 'password': None}]
+
+    lines = list(table.render_rows([dict(d) for d in data]))
+
+    assert '\n'.join(lines) == table.render([dict(d) for d in data])
+
+
+def test_render_rows_yields_first_lines_before_consuming_all_data():
+    table = Table(headers=['name'])
+    consumed = []
+
+    def data():
+        for index in range(10):
+            consumed.append(index)
+            yield {'name': 'name{}'.format(index)}
+
+    lines = table.render_rows(data(), sample_size=2)
+    header = [next(lines) for _ in range(3)]
+
+    assert 'Name' in header[1]
+    assert consumed == [0, 1]
+    assert len(list(lines)) == 11
+
+
+def test_render_rows_stretches_rows_wider_than_sample():
+    table = Table(headers=['name'], table_format='simple')
+    data = [{'name': 'a'}, {'name': 'much wider name'}]
+
+    lines = list(table.render_rows(data, sample_size=1))
+
+    assert lines[-1] == 'much wider name'
+    assert list(table.render_rows([])) == []
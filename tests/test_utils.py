@@ -1,7 +1,7 @@
 import re
 import pytest
 
-from passpie.utils import genpass, mkdir_open, ensure_dependencies, touch
+from passpie.utils import genpass, mkdir_open, ensure_dependencies, touch, lock
 
 
 def mock_open():
@@ -18,9 +18,17 @@ def test_genpass_generates_a_password_with_length_32(mocker):
 
 
 def test_genpass_raises_value_error_when_regex_pattern_error(mocker):
-    mocker.patch('passpie.utils.rstr.xeger', side_effect=re.error('regex pattern error'))
     with pytest.raises(ValueError):
-        genpass("\w{32}")
+        genpass("[\w{32}")
+
+
+def test_genpass_uses_rstr_for_patterns_unsupported_by_generator(mocker):
+    mock_xeger = mocker.patch('passpie.utils.rstr.xeger', return_value='aa')
+    assert genpass(r"(a)\1") == 'aa'
+    mock_xeger.assert_called_once_with(r"(a)\1")
+    mock_xeger.side_effect = re.error('regex pattern error')
+    with pytest.raises(ValueError):
+        genpass(r"(a)\1")
 
 
 def test_mkdir_open_makedirs_on_path_dirname(mocker):
@@ -65,3 +73,17 @@ def test_touch_open_file_on_path(mocker):
 
     assert mock_builtin_open.called
     mock_builtin_open.assert_called_once_with(path, 'w')
+
+
+def test_lock_creates_lock_file_inside_git_directory(tmpdir):
+    tmpdir.mkdir('.git')
+    with lock(str(tmpdir)):
+        assert tmpdir.join('.git', '.passpie.lock').check()
+    assert not tmpdir.join('.passpie.lock').check()
+
+
+def test_lock_does_nothing_when_path_does_not_exist(tmpdir):
+    path = str(tmpdir.join('missing'))
+    with lock(path):
+        pass
+    assert not tmpdir.join('missing').check()